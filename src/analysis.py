@@ -1,17 +1,103 @@
-from colorthief import ColorThief
 import google.generativeai as genai
 import os
-from PIL import Image
+import threading
+import concurrent.futures
+import json
+from collections import OrderedDict
+from analysis_cache import vibe_fingerprint
+from image_record import as_record
+from near_duplicates import NearDuplicateIndex, record_fingerprint, DEFAULT_MAX_DISTANCE
+from palette import extract_palettes
+from tagging import TaggingScheduler, MicroBatcher, CallBudget, shared_bucket, DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_MAX_CONCURRENCY
+from tag_backends import GeminiBackend, HeuristicBackend, error_tags
+from tag_budget import RepresentativeSelector, RequestAllowance
+from vibe import VIBE_SCHEMA, VibeSchemaError, parse_vibe
+
+DEFAULT_MODEL_NAME = "gemini-1.5-flash"
+
+# Images packed into one tagging request (1 = one request per image)
+TAG_BATCH_SIZE = 4
+# Concurrent assets whose palettes are extracted in one vectorized pass, and how long
+# the first one waits for company (palettes take milliseconds, so only briefly)
+PALETTE_BATCH_SIZE = 16
+PALETTE_MAX_WAIT = 0.02
+# Calls held back from a scan's call budget for the vibe check (the request plus one repair)
+VIBE_CALLS = 2
+
+# Process-wide results by content hash, shared by every AssetAnalyzer (least recently used dropped first)
+MEMO_SIZE = 4096
+_analysis_memo = OrderedDict()
+_memo_lock = threading.Lock()
+# Parsed vibe checks by vibe_fingerprint (None = the model never produced a valid one)
+_vibe_memo = {}
+_vibe_locks = {}
+
+
+def _label(image):
+    return getattr(image, 'path', image)
+
+
+def _color_weights(shares, record):
+    area = record.width * record.height
+    return [round(share * area) for share in shares]
+
+
+def _valid_tags(tags):
+    return bool(tags) and not any(t.startswith("Error") for t in tags)
+
+
+def _copy_tags(result, representative, budget):
+    """Budgeted runs: gives an untagged result the tags of the representative it resembles."""
+    result['tags'] = list(budget.tags[representative])
+    result['tags_from'] = os.path.basename(representative)
+
+
+def _promote(result, record):
+    """Points an existing result at a larger near-duplicate of the same picture."""
+    # Same picture, more pixels: scale the color masses to the new size
+    scale = (record.width * record.height) / max(result['width'] * result['height'], 1)
+    result['color_weights'] = [round(w * scale) for w in result['color_weights']]
+    result.update(record.metadata())
+    result['path'] = record.path
+    result['filename'] = os.path.basename(record.path)
 
 class AssetAnalyzer:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, near_duplicate_distance=DEFAULT_MAX_DISTANCE, model=None,
+                 requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 tag_batch_size=TAG_BATCH_SIZE, cache=None, model_name=DEFAULT_MODEL_NAME, image_spec=None, tagger=None,
+                 call_budget=None):
+        """
+        Args:
+            api_key: Gemini API key (without it tags come from the offline heuristic backend and the vibe check is off)
+            near_duplicate_distance: Max dHash distance (bits of 64) for two assets to count as the same picture
+            model: Object with generate_content(parts), used instead of Gemini (e.g. a local fake)
+            requests_per_minute: Model quota; shared by every analyzer using the same key
+            max_concurrency: Model calls in flight at once
+            tag_batch_size: Images tagged per request (falls back to single-image calls if the reply can't be parsed)
+            cache: AnalysisCache checked before any colors, tags or vibe are computed
+            model_name: Gemini model to use
+            image_spec: Overrides MODEL_IMAGE_SPECS for the images sent to the model
+            tagger: TaggingBackend to use instead of the default (Gemini if configured, else HeuristicBackend)
+            call_budget: Max model calls per analyze_stream / analyze_batch run, vibe check included.
+                Only a diverse subset of assets is then tagged; the rest copy their nearest representative's tags.
+        """
         self.api_key = api_key
+        self.near_duplicate_distance = near_duplicate_distance
+        self.max_concurrency = max_concurrency
+        self.tag_batch_size = tag_batch_size
+        self.cache = cache
+        self.call_budget = call_budget
+        # Per-run budget state (see _start_budget)
+        self._allowance = None
+        self._vibe_budget = None
         print(f"DEBUG: AssetAnalyzer initialized with key: {str(self.api_key)[:5]}... (Type: {type(self.api_key)})")
         
-        if self.api_key:
+        if model is not None:
+            self.model = model
+        elif self.api_key:
             try:
                 genai.configure(api_key=self.api_key)
-                self.model = genai.GenerativeModel('gemini-1.5-flash')
+                self.model = genai.GenerativeModel(model_name)
                 print("DEBUG: Gemini Model Configured Successfully")
             except Exception as e:
                 print(f"DEBUG: Gemini Configuration Failed: {e}")
@@ -19,102 +105,389 @@ class AssetAnalyzer:
         else:
             print("DEBUG: No API Key provided to AssetAnalyzer")
             self.model = None
+        
+        self.scheduler = None
+        if self.model:
+            bucket = shared_bucket(self.api_key or id(self.model), requests_per_minute)
+            self.scheduler = TaggingScheduler(self.model, bucket, max_concurrency=max_concurrency)
+        if tagger is None:
+            tagger = GeminiBackend(self.scheduler, model_name, image_spec) if self.scheduler else HeuristicBackend()
+        self.tagger = tagger
+        # Concurrent analyze_asset calls hand their images to one batched tagging call
+        self.tag_batcher = MicroBatcher(self.generate_tags_batch, tag_batch_size) if tag_batch_size > 1 else None
+        # ... and their thumbnails to one batched k-means pass
+        self.palette_batcher = MicroBatcher(self._palette_batch, PALETTE_BATCH_SIZE, PALETTE_MAX_WAIT)
 
-    def get_dominant_colors(self, image_path, count=5):
+    def get_dominant_colors(self, image, count=5):
         """
-        Extracts dominant colors from an image.
+        Extracts dominant colors from an image (AssetImage record or path).
         Returns a list of hex color codes.
         """
+        return self.get_palette(image, count)[0]
+
+    def get_palette(self, image, count=5):
+        """
+        Like get_dominant_colors, but returns (hex_colors, shares) where shares
+        is the fraction of the image each color covers.
+        """
         try:
-            if image_path.endswith('.svg'):
-                return [] # ColorThief doesn't support SVG
+            record = as_record(image)
+            if record.is_vector:
+                return [], [] # No raster pixels in an SVG
                 
-            color_thief = ColorThief(image_path)
-            palette = color_thief.get_palette(color_count=count)
-            # Convert RGB to Hex
-            return ['#{:02x}{:02x}{:02x}'.format(r, g, b) for r, g, b in palette]
+            return extract_palettes([record.thumbnail], count)[0]
         except Exception as e:
-            print(f"Color extraction failed for {image_path}: {e}")
-            return []
+            print(f"Color extraction failed for {_label(image)}: {e}")
+            return [], []
 
-    def generate_tags(self, image_path):
+    def get_palettes(self, records, count=5):
         """
-        Uses Gemini to generate tags for the image.
+        Palettes for many AssetImage records in one vectorized pass.
+        Returns {record.path: (hex_colors, shares)}; vectors get ([], []).
         """
-        if not self.model or not self.api_key:
-            return ["AI Not Configured"]
-            
+        raster = [r for r in records if not r.is_vector]
         try:
-            if image_path.endswith('.svg'):
-                return ["Vector Graphic"] 
-                
-            img = Image.open(image_path)
-            prompt = "Analyze this image and provide 3-5 short, relevant tags describing the subject matter, style, and visual elements. Return them as a comma-separated list."
-            response = self.model.generate_content([prompt, img])
-            return [tag.strip() for tag in response.text.split(',')]
+            palettes = extract_palettes([r.thumbnail for r in raster], count)
         except Exception as e:
-            error_msg = str(e)
-            print(f"AI tagging failed for {image_path}: {error_msg}")
-            # Return a short error for the UI
-            if "403" in error_msg:
-                return ["Error: Invalid API Key"]
-            elif "429" in error_msg:
-                return ["Error: Rate Limit"]
-            else:
-                return [f"Error: {error_msg[:20]}..."]
-
-    def analyze_batch(self, image_paths, progress_callback=None):
-        results = []
-        total = len(image_paths)
+            print(f"Batch color extraction failed, falling back to per-image: {e}")
+            palettes = [self.get_palette(r, count) for r in raster]
+        result = {r.path: ([], []) for r in records if r.is_vector}
+        result.update((r.path, p) for r, p in zip(raster, palettes))
+        return result
+
+    def _palette_batch(self, records):
+        palettes = self.get_palettes(records)
+        return [palettes[r.path] for r in records]
+
+    def generate_tags(self, image):
+        """
+        Tags the image (AssetImage record or path) with the configured backend.
+        """
+        try:
+            record = as_record(image)
+        except Exception as e:
+            print(f"Could not decode {_label(image)}: {e}")
+            return [f"Error: {str(e)[:20]}..."]
+        if record.is_vector:
+            return ["Vector Graphic"] 
+        self._sending([record])
+        return self.tagger.tag(record)
+
+    def generate_tags_batch(self, records):
+        """Tags several raster AssetImage records in one backend call. Returns one tag list per record."""
+        self._sending(records)
+        return self.tagger.tag_batch(records)
+
+    def _sending(self, records):
+        allowance = self._allowance
+        if allowance:
+            allowance.sending(r.path for r in records)
+
+    def _tag(self, record):
+        if self.tag_batcher and not record.is_vector:
+            return self.tag_batcher.submit(record)
+        return self.generate_tags(record)
+
+    def analyze_batch(self, images, progress_callback=None):
+        """
+        Analyzes a finished list of assets, computing every palette up front in
+        one vectorized pass (analyze_stream can only batch the assets that are
+        in flight together).
+        """
+        records = []
+        for image in images:
+            try:
+                records.append(as_record(image))
+            except Exception as e:
+                print(f"Could not decode {_label(image)}: {e}")
+        
+        pending = [r for r in records if not self._cached(r.digest)]
+        palettes = self.get_palettes(pending)
+        total = len(records)
+        
+        def tracked():
+            for i, record in enumerate(records):
+                if progress_callback:
+                    progress_callback(i + 1, total, f"Analyzing asset {i+1}/{total}...")
+                yield record
+            
+        return list(self.analyze_stream(tracked(), palettes))
+
+    def analyze_stream(self, images, palettes=None):
+        """
+        Analyzes assets (AssetImage records or paths) as they arrive from any
+        iterable (e.g. AssetScraper.scrape_stream) and yields each result as
+        soon as it is ready, so analysis overlaps with downloading. Up to
+        max_concurrency * tag_batch_size assets are analyzed at once (tagging is
+        the slow part), so results may come back out of order.
+        
+        Near-duplicates (same picture at another size / crop / encoding) are not
+        analyzed again. If a larger member of an already-yielded cluster arrives,
+        that earlier result is updated in place to point at the larger file.
+        
+        palettes optionally maps record paths to precomputed (colors, shares);
+        otherwise assets analyzed at the same time share one palette pass.
         
-        for i, path in enumerate(image_paths):
-            if progress_callback:
-                progress_callback(i + 1, total, f"Analyzing asset {i+1}/{total}...")
+        With a call_budget, assets are only tagged while they look unlike every
+        representative tagged so far (mean colour + dHash) and the requests
+        they need still fit the tagging share of the budget;
+        the others get their nearest representative's tags once those are
+        known, at the latest when the stream ends.
+        """
+        index = NearDuplicateIndex(self.near_duplicate_distance)
+        results_by_path = {}
+        in_flight = {}  # future -> record, submitted under record.path
+        upgrades = {}  # submitted path -> larger duplicate that arrived while it was in flight
+        submitted_as = {}  # cluster key -> submitted path of its still-running result
+        # Enough workers to fill a tagging batch for every request slot
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_concurrency * max(1, self.tag_batch_size))
+        budget = self._start_budget()
+        roles = {}  # submitted path -> ('tag' | 'copy', representative path)
+        untagged = []  # (result, representative path) still waiting for tags
+        
+        def finished(block):
+            done = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)[0] if block else [f for f in in_flight if f.done()]
+            for future in done:
+                record = in_flight.pop(future)
+                path = record.path
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # One bad asset (cache write, tagger, ...) must not end the whole stream
+                    print(f"Analysis failed for {record.path}: {e}")
+                    result = self._failed_result(record, e)
+                if path in roles:
+                    role, representative = roles.pop(path)
+                    if role == 'tag' and _valid_tags(result['tags']):
+                        budget.tags[path] = result['tags']
+                    elif representative in budget.tags:
+                        _copy_tags(result, representative, budget)
+                    else:
+                        untagged.append((result, representative))
+                if path in upgrades:
+                    _promote(result, upgrades.pop(path))
+                results_by_path[result['path']] = result
+                yield result
+        
+        try:
+            for image in images:
+                try:
+                    record = as_record(image)
+                except Exception as e:
+                    print(f"Could not decode {_label(image)}: {e}")
+                    continue
+                
+                hash_value, color, area = record_fingerprint(record)
+                if hash_value is not None:
+                    status, cluster = index.add(hash_value, color, area, record.path)
+                    if status == 'duplicate':
+                        continue
+                    if status == 'replaces':
+                        key = cluster['key']
+                        if key in results_by_path:
+                            result = results_by_path.pop(key)
+                            _promote(result, record)
+                            results_by_path[record.path] = result
+                        else:
+                            # Representative is still being analyzed: swap it in once done
+                            path = submitted_as.pop(key, key)
+                            upgrades[path] = record
+                            submitted_as[record.path] = path
+                        continue
+                
+                tag = True
+                if budget and hash_value is not None and not self._cached(record.digest):
+                    role, representative = budget.choose(record.path, hash_value, color)
+                    roles[record.path] = (role, representative)
+                    tag = role == 'tag'
                 
-            colors = self.get_dominant_colors(path)
-            tags = self.generate_tags(path)
+                future = executor.submit(self.analyze_asset, record, (palettes or {}).get(record.path), tag)
+                in_flight[future] = record
+                yield from finished(block=False)
             
-            results.append({
-                "path": path,
-                "filename": os.path.basename(path),
-                "colors": colors,
-                "tags": tags
-            })
+            while in_flight:
+                yield from finished(block=True)
             
-        return results
+            # Representatives that finished late or failed: settle on the nearest one that has tags
+            # (results were already yielded; like near-duplicate promotion, they're updated in place)
+            for result, representative in untagged:
+                source = representative if representative in budget.tags else budget.nearest_tagged(representative)
+                if source:
+                    _copy_tags(result, source, budget)
+        finally:
+            # Consumer stopped early: don't start assets nobody will read
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._end_budget()
+
+    def _failed_result(self, record, error):
+        """Result for an asset whose analysis raised: no colors, an error tag."""
+        result = {
+            "path": record.path,
+            "filename": os.path.basename(record.path),
+            "colors": [],
+            "color_weights": [],
+            "tags": error_tags(error)
+        }
+        result.update(record.metadata())
+        return result
+
+    def _cached(self, digest):
+        """(colors, shares, tags) from the in-process memo or the disk cache, or None."""
+        if not digest:
+            return None
+        # Tags differ per backend: never serve heuristic tags to a Gemini analyzer (or vice versa)
+        key = f"{digest}:{self.tagger.name}"
+        with _memo_lock:
+            memo = _analysis_memo.get(key)
+            if memo:
+                _analysis_memo.move_to_end(key)
+                return memo
+        stored = self.cache.get_asset(key) if self.cache else None
+        if stored:
+            self._remember(digest, *stored, persist=False)
+        return stored
+
+    def _remember(self, digest, colors, shares, tags, persist=True):
+        key = f"{digest}:{self.tagger.name}"
+        with _memo_lock:
+            _analysis_memo[key] = (colors, shares, tags)
+            if len(_analysis_memo) > MEMO_SIZE:
+                _analysis_memo.popitem(last=False)
+        if persist and self.cache:
+            self.cache.put_asset(key, colors, shares, tags)
+
+    def _start_budget(self):
+        """
+        RepresentativeSelector for a budgeted run, or None if unbudgeted.
+
+        The tagger gets call_budget - VIBE_CALLS calls of its own; the vibe
+        check keeps a separate VIBE_CALLS so tagging can never starve it.
+        """
+        self._end_budget()
+        self._vibe_budget = None
+        if not self.call_budget or not self.tagger.metered:
+            return None
+        self._vibe_budget = CallBudget(min(VIBE_CALLS, self.call_budget))
+        batcher = self.tag_batcher
+        self._allowance = RequestAllowance(CallBudget(max(0, self.call_budget - VIBE_CALLS)),
+                                           batcher.batch_size if batcher else 1, batcher.max_wait if batcher else 0)
+        self.tagger.budget = self._allowance
+        return RepresentativeSelector(self._allowance)
+
+    def _end_budget(self):
+        """Lifts the tagging cap once a run is over (the vibe allowance stays until the next run)."""
+        self.tagger.budget = None
+        self._allowance = None
+
+    def analyze_asset(self, image, palette=None, tag=True):
+        """
+        palette: precomputed (colors, shares) from get_palettes, if any.
+        tag: False leaves tags empty (budgeted runs fill them in from a representative).
+        """
+        record = as_record(image)
+        # Identical bytes (same image from another page, URL or earlier scan) are analyzed once
+        digest = record.digest
+        cached = self._cached(digest)
+        
+        if cached:
+            colors, shares, tags = cached
+        else:
+            colors, shares = palette or (self.palette_batcher.submit(record) if not record.is_vector else ([], []))
+            tags = self._tag(record) if tag else []
+            if digest and _valid_tags(tags):
+                self._remember(digest, colors, shares, tags)
+        
+        result = {
+            "path": record.path,
+            "filename": os.path.basename(record.path),
+            "colors": colors,
+            # Pixels each color covers in the full-size image (weights the global palette)
+            "color_weights": _color_weights(shares, record),
+            "tags": tags
+        }
+        result.update(record.metadata())
+        return result
 
     def analyze_vibe(self, tags, palette):
         """
         Generates a 'Vibe Check' for the brand based on aggregated data.
+
+        Returns the validated vibe as a dict (VibeResult.to_dict()) or None.
+        A reply that isn't valid schema JSON gets one repair request; results,
+        including replies that stay unparseable, are memoized per (tags, palette)
+        so reruns of the app never repeat the paid call.
         """
-        if not self.model:
+        key = vibe_fingerprint(tags, palette)
+        with _memo_lock:
+            if key in _vibe_memo:
+                return _vibe_memo[key]
+            lock = _vibe_locks.setdefault(key, threading.Lock())
+
+        # One model call per fingerprint even when both battle sides ask at once
+        with lock:
+            with _memo_lock:
+                if key in _vibe_memo:
+                    return _vibe_memo[key]
+            vibe = self._cached_vibe(tags, palette)
+            if vibe is None:
+                if not self.scheduler:
+                    return None
+                try:
+                    vibe = self._request_vibe(tags, palette)
+                except Exception as e:
+                    print(f"Vibe check failed: {e}")
+                    return None  # Transient (network, quota): not memoized
+                if vibe is not None and self.cache:
+                    self.cache.put_vibe(tags, palette, json.dumps(vibe))
+            with _memo_lock:
+                _vibe_memo[key] = vibe
+        return vibe
+
+    def _cached_vibe(self, tags, palette):
+        cached = self.cache.get_vibe(tags, palette) if self.cache else None
+        if not cached:
             return None
-            
         try:
-            # Construct a prompt for high-level analysis
-            prompt = f"""
-            You are a Brand Strategist. Analyze these visual elements:
-            
-            Top Visual Tags: {', '.join(tags[:15])}
-            Dominant Colors (Hex): {', '.join(palette[:5])}
-            
-            Task:
-            1. Describe the brand's 'Vibe' in exactly 3 adjectives.
-            2. Give a 'Personality Score' in the format "Trait: X/10". Choose a trait relevant to the vibe (e.g., Luxury, Playfulness, Minimalism, Aggression).
-            3. Write a 1-sentence explanation.
-            
-            Output strictly as valid JSON:
-            {{
-                "vibe_keywords": ["Adj1", "Adj2", "Adj3"],
-                "personality_score": "Trait: X/10",
-                "explanation": "..."
-            }}
-            """
-            
-            response = self.model.generate_content(prompt)
-            # Simple cleaning in case of markdown blocks
-            text = response.text.replace('```json', '').replace('```', '').strip()
-            return text
-        except Exception as e:
-            print(f"Vibe check failed: {e}")
+            return parse_vibe(cached).to_dict()
+        except VibeSchemaError:
+            return None  # Stored before validation existed
+
+    def _request_vibe(self, tags, palette):
+        """Asks the model, then once more with the validation error if the reply doesn't fit the schema."""
+        # Construct a prompt for high-level analysis
+        prompt = f"""
+        You are a Brand Strategist. Analyze these visual elements:
+
+        Top Visual Tags: {', '.join(tags[:15])}
+        Dominant Colors (Hex): {', '.join(palette[:5])}
+
+        Task:
+        1. Describe the brand's 'Vibe' in exactly 3 adjectives.
+        2. Give a 'Personality Score' in the format "Trait: X/10". Choose a trait relevant to the vibe (e.g., Luxury, Playfulness, Minimalism, Aggression).
+        3. Write a 1-sentence explanation.
+
+        Output strictly as valid JSON:
+        {VIBE_SCHEMA}
+        """
+        text = self.scheduler.generate(prompt, budget=self._vibe_budget).text
+        try:
+            return parse_vibe(text).to_dict()
+        except VibeSchemaError as e:
+            print(f"Vibe reply invalid ({e}), asking for a repair")
+            error = e
+
+        repair = f"""
+        This reply was supposed to be JSON matching the schema below but is invalid ({error}).
+        Return only the corrected JSON object, nothing else.
+
+        Schema:
+        {VIBE_SCHEMA}
+
+        Reply:
+        {text[:2000]}
+        """
+        try:
+            return parse_vibe(self.scheduler.generate(repair, budget=self._vibe_budget).text).to_dict()
+        except VibeSchemaError as e:
+            print(f"Vibe repair failed: {e}")
             return None
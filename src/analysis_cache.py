@@ -0,0 +1,116 @@
+"""
+Persistent Analysis Cache for AssetFlow
+Remembers colors/tags per image content hash and vibe checks per (tags, palette) fingerprint across sessions.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def vibe_fingerprint(tags, palette):
+    """Stable key for the inputs analyze_vibe actually sends to the model."""
+    payload = json.dumps([list(tags[:15]), [c.lower() for c in palette[:5]]])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+    """
+    SQLite cache of analysis results.
+
+    assets: '<content digest>:<tagging backend>' -> colors, color shares and tags
+    vibes:  vibe_fingerprint(tags, palette) -> vibe JSON text
+
+    Entries expire after ttl seconds; once the stored payloads exceed
+    max_bytes the least recently used rows are dropped.
+    """
+
+    def __init__(self, path=os.path.join("assets", ".analysis_cache.sqlite"), ttl=30 * 24 * 3600, max_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            path: SQLite database file
+            ttl: Seconds an entry stays valid (competitor sites change; tags are re-fetched after this)
+            max_bytes: Total payload size kept before LRU eviction kicks in
+        """
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        for table in ("assets", "vibes"):
+            self._db.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    key TEXT PRIMARY KEY,
+                    payload TEXT,
+                    size INTEGER,
+                    created REAL,
+                    accessed REAL
+                )
+            """)
+        self._db.commit()
+
+    def _get(self, table, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(f"SELECT payload, created FROM {table} WHERE key = ?", (key,)).fetchone()
+            if not row:
+                return None
+            if now - row[1] > self.ttl:
+                self._db.execute(f"DELETE FROM {table} WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute(f"UPDATE {table} SET accessed = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        return row[0]
+
+    def _put(self, table, key, payload):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO {table} (key, payload, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now)
+            )
+            self._db.commit()
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            cutoff = time.time() - self.ttl
+            for table in ("assets", "vibes"):
+                self._db.execute(f"DELETE FROM {table} WHERE created < ?", (cutoff,))
+            total = self._db.execute(
+                "SELECT (SELECT COALESCE(SUM(size), 0) FROM assets) + (SELECT COALESCE(SUM(size), 0) FROM vibes)"
+            ).fetchone()[0]
+            if total > self.max_bytes:
+                rows = self._db.execute(
+                    "SELECT 'assets', key, size, accessed FROM assets UNION ALL "
+                    "SELECT 'vibes', key, size, accessed FROM vibes ORDER BY accessed ASC"
+                ).fetchall()
+                for table, key, size, _ in rows:
+                    if total <= self.max_bytes:
+                        break
+                    self._db.execute(f"DELETE FROM {table} WHERE key = ?", (key,))
+                    total -= size
+            self._db.commit()
+
+    def get_asset(self, key):
+        """Returns (colors, shares, tags) stored under key (content digest + tagging backend), or None."""
+        payload = self._get("assets", key)
+        if payload is None:
+            return None
+        data = json.loads(payload)
+        return data["colors"], data["shares"], data["tags"]
+
+    def put_asset(self, key, colors, shares, tags):
+        self._put("assets", key, json.dumps({"colors": colors, "shares": shares, "tags": tags}))
+
+    def get_vibe(self, tags, palette):
+        """Returns the cached vibe JSON text for these inputs, or None."""
+        return self._get("vibes", vibe_fingerprint(tags, palette))
+
+    def put_vibe(self, tags, palette, vibe):
+        self._put("vibes", vibe_fingerprint(tags, palette), vibe)
@@ -1,20 +1,32 @@
 from collections import Counter
+from palette import cluster_colors
 
 def calculate_global_palette(scraped_data, top_n=5):
     """
-    Aggregates all colors from scraped data and returns the top N most frequent global colors.
+    Aggregates all colors from scraped data and returns the top N global colors
+    (hex strings). See calculate_palette_weights.
+    """
+    return [entry["color"] for entry in calculate_palette_weights(scraped_data, top_n)]
+
+def calculate_palette_weights(scraped_data, top_n=5):
+    """
+    Clusters all colors of a scan in CIELAB (ΔE) so near-identical shades share
+    one vote, and returns the top N clusters as {"color", "weight"}.
+    Colors are weighted by the pixels they cover ('color_weights'); results
+    without weights (older scans) count each color once.
     """
     if not scraped_data:
         return []
         
     all_colors = []
+    all_weights = []
     for item in scraped_data:
-        if item.get('colors'):
-            all_colors.extend(item['colors'])
+        colors = item.get('colors') or []
+        weights = item.get('color_weights') or [1] * len(colors)
+        all_colors.extend(colors)
+        all_weights.extend(weights)
             
-    # Simple frequency count
-    # In a more advanced version, we might cluster similar colors
-    return [color for color, count in Counter(all_colors).most_common(top_n)]
+    return [{"color": color, "weight": weight} for color, weight in cluster_colors(all_colors, all_weights)[:top_n]]
 
 def calculate_top_tags(scraped_data, top_n=10):
     """
@@ -1,10 +1,15 @@
 import streamlit as st
 import os
 import time
+import threading
 from datetime import datetime
 from urllib.parse import urlparse
 from scraper import AssetScraper
 from analysis import AssetAnalyzer
+from scan_runner import TargetScan
+from driver_pool import DriverPool
+from http_cache import HttpCache
+from analysis_cache import AnalysisCache
 from utils import clean_filename, zip_assets
 from analytics_engine import calculate_global_palette, calculate_top_tags, analyze_typography
 
@@ -78,6 +83,34 @@ def load_api_key():
 
 api_key = load_api_key()
 
+@st.cache_resource
+def get_driver_pool():
+    """One browser pool per server process; two warm browsers cover a Battle Mode scan."""
+    pool = DriverPool(size=2, max_uses=20)
+    threading.Thread(target=pool.warm, daemon=True).start()
+    return pool
+
+driver_pool = get_driver_pool()
+
+@st.cache_resource
+def get_http_cache():
+    """Shared on-disk HTTP cache so rescans only revalidate unchanged pages and images."""
+    return HttpCache(cache_dir=os.path.join("assets", ".http_cache"))
+
+http_cache = get_http_cache()
+
+@st.cache_resource
+def get_analysis_cache():
+    """Colors/tags per image hash and vibe checks, reused across rescans and lost sessions."""
+    return AnalysisCache(os.path.join("assets", ".analysis_cache.sqlite"))
+
+analysis_cache = get_analysis_cache()
+
+@st.cache_resource
+def get_vibe_analyzer():
+    """Analyzer for vibe checks requested outside a scan (e.g. stats restored from history)."""
+    return AssetAnalyzer(api_key=api_key, cache=analysis_cache)
+
 if not api_key:
     print("WARNING: Gemini API Key could not be loaded. AI features will be disabled.")
 
@@ -157,6 +190,73 @@ if 'clear_btn' in locals() and clear_btn:
 
 
 
+def add_vibe(stats, analyzer):
+    """
+    Stores the vibe check in stats. analyze_vibe memoizes per (tags, palette),
+    so reruns and rescans of unchanged stats never call the model again.
+    """
+    top_tags = [t['tag'] for t in stats.get('top_tags', [])]
+    vibe = analyzer.analyze_vibe(top_tags, stats.get('palette', []))
+    if vibe:
+        stats['vibe'] = vibe
+    return stats
+
+def stream_scan(scraper, analyzer, target_url, label, pages_limit, status_text, progress_bar, progress_span, live_placeholder):
+    """
+    Scrapes and analyzes target_url as one pipeline, rendering partial results as they arrive.
+    Returns (analyzed_data, fonts).
+    """
+    results = []
+    start, end = progress_span
+    
+    stream = scraper.scrape_stream(target_url, max_pages=pages_limit, progress_callback=lambda m: status_text.text(f"{label}: {m}"))
+    for result in analyzer.analyze_stream(stream):
+        results.append(result)
+        
+        # Candidates include images later rejected as too small, so this is a lower bound
+        total = max(scraper.download_total, len(results))
+        status_text.text(f"{label}: Analyzed {len(results)} assets ({total} candidates)...")
+        progress_bar.progress(min(start + (end - start) * len(results) / total, end))
+        
+        # Live feed of the latest assets (replaces the skeleton)
+        with live_placeholder.container():
+            st.caption(f"{label.upper()}: LIVE RESULTS ({len(results)} ASSETS)")
+            live_cols = st.columns(6)
+            for i, item in enumerate(results[-6:]):
+                with live_cols[i]:
+                    st.image(item['path'], use_container_width=True)
+                    if item['colors']:
+                        c_html = "".join([f'<span style="background:{c};width:12px;height:12px;display:inline-block;margin-right:2px;border-radius:50%;"></span>' for c in item['colors']])
+                        st.markdown(f"<div>{c_html}</div>", unsafe_allow_html=True)
+    
+    return results, scraper.fonts
+
+
+def watch_scans(scans, progress_bar, live_placeholder):
+    """Renders per-target progress for background TargetScans until all of them finish."""
+    while True:
+        running = any(scan.is_running() for scan in scans)
+        snapshots = [scan.snapshot() for scan in scans]
+        
+        overall = sum(progress for _, _, progress in snapshots) / len(scans)
+        progress_bar.progress(min(overall * 0.9, 0.9))
+        
+        with live_placeholder.container():
+            target_cols = st.columns(len(scans))
+            for col, scan, (results, message, progress) in zip(target_cols, scans, snapshots):
+                with col:
+                    st.markdown(f"**{scan.label.upper()}:** `{scan.url}`")
+                    st.progress(min(progress, 1.0))
+                    st.caption(message)
+                    thumb_cols = st.columns(3)
+                    for i, item in enumerate(results[-3:]):
+                        with thumb_cols[i]:
+                            st.image(item['path'], use_container_width=True)
+        
+        if not running:
+            break
+        time.sleep(0.5)
+
 
 if analyze_btn:
     if not url_1:
@@ -210,40 +310,50 @@ if analyze_btn:
          
          try:
             # Initialize engines
-            scraper = AssetScraper(download_folder="assets")
-            analyzer = AssetAnalyzer(api_key=api_key)
-            
-            # --- SCAN LOGIC URL 1 ---
-            status_text.text(f"Scanning Target A: {url_1}...")
+            analyzer = AssetAnalyzer(api_key=api_key, cache=analysis_cache)
             # Determine pages based on selection
             pages_limit = 3 if "FAST" in scan_depth else 15
             
-            # 1. Scrape A
-            try:
-                image_paths_1, fonts_1 = scraper.scrape(url_1, max_pages=pages_limit, progress_callback=lambda m: status_text.text(f"Target A: {m}"))
-            except Exception as e:
-                st.error(f"❌ Failed to reach Target A ({url_1})")
-                st.warning(f"Connection Error: {e}")
-                st.info("💡 Tip: Check if the URL is correct and accessible.")
-                skeleton_placeholder.empty()
-                st.stop()
-            
-            if not image_paths_1:
-                st.error(f"Target A ({url_1}) returned no assets.")
-                st.stop()
+            if st.session_state.battle_mode and url_2:
+                # --- BATTLE: scan both targets in parallel (own driver, session & analyzer each) ---
+                status_text.text(f"Scanning Target A ({url_1}) and Target B ({url_2}) in parallel...")
+                scans = [
+                    TargetScan(url_1, "Target A", api_key=api_key, max_pages=pages_limit, driver_pool=driver_pool, http_cache=http_cache, analysis_cache=analysis_cache).start(),
+                    TargetScan(url_2, "Target B", api_key=api_key, max_pages=pages_limit, driver_pool=driver_pool, http_cache=http_cache, analysis_cache=analysis_cache).start()
+                ]
+                watch_scans(scans, progress_bar, skeleton_placeholder)
                 
-            progress_bar.progress(30)
-            
-            # 2. Analyze A
-            status_text.text("Analyzing Assets A...")
-            
-            def update_progress_a(current, total, msg):
-                status_text.text(msg)
-                # Map 0-100% of analysis to 30-50% of total bar
-                p = 0.3 + (0.2 * (current / total))
-                progress_bar.progress(min(p, 0.5))
-
-            analyzed_data_1 = analyzer.analyze_batch(image_paths_1, progress_callback=update_progress_a)
+                for scan in scans:
+                    if scan.error:
+                        st.error(f"❌ Failed to reach {scan.label} ({scan.url})")
+                        st.warning(f"Connection Error: {scan.error}")
+                        st.info("💡 Tip: Check if the URL is correct and accessible.")
+                        skeleton_placeholder.empty()
+                        st.stop()
+                    if not scan.results:
+                        st.error(f"{scan.label} ({scan.url}) returned no assets.")
+                        st.stop()
+                
+                analyzed_data_1, fonts_1 = scans[0].results, scans[0].fonts
+                analyzed_data_2, fonts_2 = scans[1].results, scans[1].fonts
+            else:
+                # --- SCAN LOGIC URL 1 ---
+                status_text.text(f"Scanning Target A: {url_1}...")
+                scraper = AssetScraper(download_folder="assets", driver_pool=driver_pool, http_cache=http_cache)
+                
+                # Scrape & Analyze A (streamed: analysis starts as soon as the first asset lands)
+                try:
+                    analyzed_data_1, fonts_1 = stream_scan(scraper, analyzer, url_1, "Target A", pages_limit, status_text, progress_bar, (0.0, 0.9), skeleton_placeholder)
+                except Exception as e:
+                    st.error(f"❌ Failed to reach Target A ({url_1})")
+                    st.warning(f"Connection Error: {e}")
+                    st.info("💡 Tip: Check if the URL is correct and accessible.")
+                    skeleton_placeholder.empty()
+                    st.stop()
+                
+                if not analyzed_data_1:
+                    st.error(f"Target A ({url_1}) returned no assets.")
+                    st.stop()
             
             # FIX: Properly construct dictionary for A
             palette_1 = calculate_global_palette(analyzed_data_1)
@@ -255,38 +365,11 @@ if analyze_btn:
                 "top_tags": tags_1,
                 "typography": typo_1
             }
+            status_text.text("Analyzing Brand Personality...")
+            add_vibe(global_stats_1, analyzer)
             
-            # --- SCAN LOGIC URL 2 (Battle) ---
+            # --- STATS URL 2 (Battle) ---
             if st.session_state.battle_mode and url_2:
-                progress_bar.progress(50)
-                status_text.text(f"Scanning Target B: {url_2}...")
-                
-                # 1. Scrape B
-                try:
-                    image_paths_2, fonts_2 = scraper.scrape(url_2, max_pages=pages_limit, progress_callback=lambda m: status_text.text(f"Target B: {m}"))
-                except Exception as e:
-                    st.error(f"❌ Failed to reach Target B ({url_2})")
-                    st.warning(f"Connection Error: {e}")
-                    st.info("💡 Tip: Check if the URL is correct and accessible.")
-                    skeleton_placeholder.empty()
-                    st.stop()
-                
-                if not image_paths_2:
-                    st.error(f"Target B ({url_2}) returned no assets.")
-                    st.stop()
-                
-                # 2. Analyze B
-                status_text.text("Analyzing Assets B...")
-                
-                def update_progress_b(current, total, msg):
-                    status_text.text(msg)
-                    # Map 0-100% of analysis B to 70-90% of total bar (assuming A is done)
-                    # Actually B starts at 50%
-                    p = 0.5 + (0.4 * (current / total))
-                    progress_bar.progress(min(p, 0.9))
-
-                analyzed_data_2 = analyzer.analyze_batch(image_paths_2, progress_callback=update_progress_b)
-                
                 # FIX: Properly construct dictionary for B
                 palette_2 = calculate_global_palette(analyzed_data_2)
                 tags_2 = calculate_top_tags(analyzed_data_2)
@@ -297,6 +380,7 @@ if analyze_btn:
                     "top_tags": tags_2,
                     "typography": typo_2
                 }
+                add_vibe(global_stats_2, analyzer)
                 
                 # Save State B
                 st.session_state.scraped_data_2 = analyzed_data_2
@@ -319,8 +403,8 @@ if analyze_btn:
             
             # Zip A (standard)
             # Fix: pass directory path, not list of files
-            if image_paths_1:
-                zip_file = zip_assets(os.path.dirname(image_paths_1[0]), "brand_assets")
+            if analyzed_data_1:
+                zip_file = zip_assets(os.path.dirname(analyzed_data_1[0]['path']), "brand_assets")
             else:
                 zip_file = None
             
@@ -511,11 +595,7 @@ if st.session_state.scraped_data:
                 # Vibe Check A
                 if 'vibe' not in stats_a:
                      with st.spinner("Analyzing Vibe A..."):
-                        try:
-                            v = analyzer.analyze_vibe([t['tag'] for t in stats_a['top_tags']], stats_a['palette'])
-                            import json
-                            stats_a['vibe'] = json.loads(v.replace("```json", "").replace("```", ""))
-                        except: pass
+                        add_vibe(stats_a, get_vibe_analyzer())
                 
                 if 'vibe' in stats_a:
                     v = stats_a['vibe']
@@ -554,11 +634,7 @@ if st.session_state.scraped_data:
                  # Vibe Check B
                 if 'vibe' not in stats_b:
                      with st.spinner("Analyzing Vibe B..."):
-                        try:
-                            v = analyzer.analyze_vibe([t['tag'] for t in stats_b['top_tags']], stats_b['palette'])
-                            import json
-                            stats_b['vibe'] = json.loads(v.replace("```json", "").replace("```", ""))
-                        except: pass
+                        add_vibe(stats_b, get_vibe_analyzer())
                 
                 if 'vibe' in stats_b:
                     v = stats_b['vibe']
@@ -618,16 +694,7 @@ if st.session_state.scraped_data:
                 if 'vibe' not in st.session_state.global_stats:
                     # Trigger analysis if key exists
                     with st.spinner("Analyzing Brand Personality..."):
-                        try:
-                            top_tags = [t['tag'] for t in st.session_state.global_stats.get('top_tags', [])]
-                            palette = st.session_state.global_stats.get('palette', [])
-                            vibe = analyzer.analyze_vibe(top_tags, palette)
-                            if vibe:
-                                import json
-                                clean_json = vibe.replace("```json", "").replace("```", "")
-                                st.session_state.global_stats['vibe'] = json.loads(clean_json)
-                        except Exception as e:
-                            print(f"Vibe Error: {e}")
+                        add_vibe(st.session_state.global_stats, get_vibe_analyzer())
 
                 # Color Palette, Themes, and Typography
                 dna_cols = st.columns(3)
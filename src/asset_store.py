@@ -0,0 +1,94 @@
+"""
+Content-Addressed Asset Store for AssetFlow
+Keeps one copy of every image (keyed by a hash of its bytes) and links it into each scan folder.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+
+def content_digest(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file on disk (used to recognise assets that were already analyzed)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AssetStore:
+    """
+    Stores objects under root/<2-char prefix>/<sha256><ext>.
+
+    The digest is taken over the bytes as downloaded, so the same image reached
+    through different URLs (CDN mirrors, query-string variants, high-res guesses)
+    maps to one object and its processed form is only produced once.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def object_path(self, digest, ext):
+        return os.path.join(self.root, digest[:2], f"{digest}{ext}")
+
+    def find(self, digest):
+        """Returns the stored path for digest (any extension), or None."""
+        folder = os.path.join(self.root, digest[:2])
+        try:
+            for name in os.listdir(folder):
+                if name.startswith(digest) and not name.endswith('.tmp'):
+                    return os.path.join(folder, name)
+        except OSError:
+            pass
+        return None
+
+    def put(self, digest, content, ext):
+        """Writes content for digest unless it is already stored. Returns the object path."""
+        path = self.object_path(digest, ext)
+        with self._lock:
+            if os.path.exists(path):
+                return path
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Unique temp name: other AssetStore instances (battle mode) may write the same digest concurrently
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                # Same digest means same bytes: another writer finishing first is success
+                if not os.path.exists(path):
+                    raise
+        return path
+
+    def link_into(self, object_path, save_dir, prefix="asset_"):
+        """
+        Exposes a stored object inside a scan folder (hard link, copy as fallback)
+        and returns its path there. Names derive from the digest, so an existing
+        file from an earlier scan of the same site already has the right content.
+        """
+        name = os.path.basename(object_path)
+        dest = os.path.join(save_dir, f"{prefix}{name[:16]}{os.path.splitext(name)[1]}")
+        try:
+            os.link(object_path, dest)
+        except FileExistsError:
+            pass
+        except OSError:
+            # Filesystems without hard links (e.g. some Windows / network drives)
+            try:
+                with open(dest, 'xb') as out, open(object_path, 'rb') as src:
+                    shutil.copyfileobj(src, out)
+            except FileExistsError:
+                pass
+        return dest
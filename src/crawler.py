@@ -0,0 +1,173 @@
+"""
+Async Crawl Engine for AssetFlow
+Fetches sub-pages concurrently on a single asyncio event loop instead of one thread per request.
+"""
+
+import asyncio
+import itertools
+from urllib.parse import urlparse
+
+import aiohttp
+
+# Lower score = crawled first within the same depth
+LINK_PRIORITIES = [
+    (0, ('product', 'collection', 'catalog', 'shop', 'store')),
+    (1, ('about', 'brand', 'story', 'lookbook', 'campaign', 'gallery')),
+    (3, ('blog', 'news', 'archive', 'author', 'tag/', 'page/', 'category')),
+]
+DEFAULT_LINK_PRIORITY = 2
+
+
+def score_link(url):
+    """Scores a URL by path pattern so brand-heavy pages are fetched before archives."""
+    path = urlparse(url).path.lower()
+    for score, patterns in LINK_PRIORITIES:
+        if any(p in path for p in patterns):
+            return score
+    return DEFAULT_LINK_PRIORITY
+
+
+class CrawlFrontier:
+    """Breadth-first priority frontier: ordered by (depth, link score, discovery order)."""
+
+    def __init__(self, max_depth=1):
+        self.max_depth = max_depth
+        self.seen = set()
+        self._queue = asyncio.PriorityQueue()
+        self._counter = itertools.count()
+
+    def push(self, url, depth):
+        """Schedules url unless it was seen before or is deeper than max_depth."""
+        url = url.split('#')[0]
+        if depth > self.max_depth or url in self.seen:
+            return False
+        self.seen.add(url)
+        self._queue.put_nowait((depth, score_link(url), next(self._counter), url))
+        return True
+
+    def mark_seen(self, url):
+        self.seen.add(url.split('#')[0])
+
+    async def pop(self):
+        depth, _, _, url = await self._queue.get()
+        return url, depth
+
+    def task_done(self):
+        self._queue.task_done()
+
+    async def join(self):
+        await self._queue.join()
+
+
+class AsyncCrawler:
+    """Fetches pages with aiohttp using per-host and global concurrency limits."""
+
+    def __init__(self, headers=None, max_concurrency=20, per_host_limit=5, timeout=5, http_cache=None):
+        """
+        Args:
+            headers: Default request headers (e.g. User-Agent)
+            max_concurrency: Maximum number of requests in flight overall
+            per_host_limit: Maximum number of requests in flight per host
+            timeout: Total timeout per request in seconds
+            http_cache: Optional HttpCache used to revalidate pages fetched before
+        """
+        self.headers = headers or {}
+        self.http_cache = http_cache
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self._host_limits = {}
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    async def _fetch(self, session, url):
+        """Returns the page HTML, or None on any error / non-200 response."""
+        async with self._host_semaphore(url):
+            try:
+                if self.http_cache:
+                    resp = await self.http_cache.get_async(session, url)
+                    return resp.text if resp.status_code == 200 else None
+                async with session.get(url) as resp:
+                    if resp.status == 200:
+                        return await resp.text(errors='replace')
+            except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeDecodeError):
+                return None
+        return None
+
+    async def crawl(self, seed_urls, max_pages, on_page, max_depth=1, visited=(), stylesheets=None):
+        """
+        Crawls breadth-first from seed_urls (depth 1) until max_pages pages have
+        loaded or the frontier is exhausted.
+
+        on_page(url, html, depth) is called for every page that loaded and may
+        return the links found on it; those are scheduled at depth + 1 while the
+        crawl is still running. Outstanding requests are cancelled as soon as
+        the page budget is spent. URLs in visited (e.g. the homepage loaded
+        through Selenium) are never fetched again.
+
+        stylesheets: optional StylesheetCollector; it fetches through the same
+        session and limits while pages load and is drained before returning.
+        """
+        if (max_pages <= 0 or not seed_urls) and not stylesheets:
+            return 0
+
+        self._host_limits = {}
+        frontier = CrawlFrontier(max_depth=max_depth)
+        for url in visited:
+            frontier.mark_seen(url)
+        for url in seed_urls if max_pages > 0 else ():
+            frontier.push(url, 1)
+
+        pages_done = 0
+        budget_spent = asyncio.Event()
+
+        async def worker(session):
+            nonlocal pages_done
+            while True:
+                url, depth = await frontier.pop()
+                try:
+                    html = await self._fetch(session, url)
+                    if html is not None and not budget_spent.is_set():
+                        pages_done += 1
+                        try:
+                            links = on_page(url, html, depth)
+                        except Exception as e:
+                            print(f"Page handler failed for {url}: {e}")
+                            links = None
+                        if pages_done >= max_pages:
+                            budget_spent.set()
+                        # Feed discoveries straight back so idle workers pick them up
+                        for link in links or []:
+                            frontier.push(link, depth + 1)
+                finally:
+                    frontier.task_done()
+
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.per_host_limit)
+        async with aiohttp.ClientSession(headers=self.headers, timeout=timeout, connector=connector) as session:
+            if stylesheets:
+                stylesheets.bind(lambda url: self._fetch(session, url))
+            workers = [asyncio.create_task(worker(session)) for _ in range(min(self.max_concurrency, max(max_pages, 0)))]
+
+            drain_task = asyncio.create_task(frontier.join())
+            budget_task = asyncio.create_task(budget_spent.wait())
+            await asyncio.wait({drain_task, budget_task}, return_when=asyncio.FIRST_COMPLETED)
+
+            # Cancel whatever is still queued or in flight
+            for task in [drain_task, budget_task, *workers]:
+                task.cancel()
+            await asyncio.gather(drain_task, budget_task, *workers, return_exceptions=True)
+
+            # Stylesheets found on the last pages may still be downloading
+            if stylesheets:
+                await stylesheets.join()
+
+        return pages_done
+
+    def run(self, seed_urls, max_pages, on_page, max_depth=1, visited=(), stylesheets=None):
+        """Synchronous entry point (Streamlit scripts have no running event loop)."""
+        return asyncio.run(self.crawl(seed_urls, max_pages, on_page, max_depth=max_depth, visited=visited, stylesheets=stylesheets))
@@ -0,0 +1,118 @@
+"""
+CSS Asset Extraction for AssetFlow
+Finds image references in CSS (url(), image-set(), multi-layer backgrounds) and fetches linked stylesheets once per crawl.
+"""
+
+import asyncio
+import re
+from urllib.parse import urljoin
+
+# Stylesheets fetched per crawl at most (themes often chain dozens of @imports)
+MAX_STYLESHEETS = 60
+
+_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+_URL = re.compile(r'url\(\s*(?:"([^"]*)"|\'([^\']*)\'|([^)\s]*))\s*\)', re.IGNORECASE)
+_IMAGE_SET = re.compile(r'(?:-webkit-)?image-set\(', re.IGNORECASE)
+_QUOTED = re.compile(r'"([^"]+)"|\'([^\']+)\'')
+_TYPE_HINT = re.compile(r'type\(\s*(?:"[^"]*"|\'[^\']*\')\s*\)', re.IGNORECASE)
+_IMPORT = re.compile(r'@import\s+(?:url\(\s*)?(?:"([^"]+)"|\'([^\']+)\'|([^)\s;]+))', re.IGNORECASE)
+
+
+def _closing_paren(css, start):
+    """Index just past the ')' closing the '(' that ends at start, or len(css)."""
+    depth = 1
+    for i in range(start, len(css)):
+        if css[i] == '(':
+            depth += 1
+        elif css[i] == ')':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return len(css)
+
+
+def parse_css(css, base_url):
+    """
+    Returns (image_urls, import_urls) referenced by a stylesheet, inline style or
+    <style> block, resolved against base_url (the stylesheet's own URL for
+    linked sheets). Covers every url() in a value, including multi-layer
+    backgrounds, plus the bare strings of image-set(). data: URIs are skipped.
+    """
+    css = _COMMENT.sub('', css)
+    imports = set()
+    for match in _IMPORT.finditer(css):
+        imports.add(urljoin(base_url, next(g for g in match.groups() if g)))
+
+    refs = [next((g for g in m.groups() if g is not None), '') for m in _URL.finditer(css)]
+    # image-set("a.png" 1x, "b.png" 2x): candidates may be plain strings instead of url()
+    for match in _IMAGE_SET.finditer(css):
+        body = css[match.end():_closing_paren(css, match.end()) - 1]
+        body = _URL.sub('', _TYPE_HINT.sub('', body))
+        refs += [a or b for a, b in _QUOTED.findall(body)]
+
+    images = set()
+    for ref in refs:
+        ref = ref.strip()
+        if not ref or ref.startswith(('data:', '#')):
+            continue
+        full = urljoin(base_url, ref)
+        if full.startswith('http') and full not in imports:
+            images.add(full)
+    return images, imports
+
+
+class StylesheetCollector:
+    """
+    Fetches every linked stylesheet (and its @imports) once per crawl and
+    collects the image URLs they reference.
+
+    Pages hand over their <link rel="stylesheet"> URLs with add(); AsyncCrawler
+    binds a fetch coroutine once its session is open, so the sheets download on
+    the crawl's own event loop alongside the pages, and awaits join() before the
+    session closes. URLs added before bind() are queued until then.
+    """
+
+    def __init__(self, max_stylesheets=MAX_STYLESHEETS):
+        self.max_stylesheets = max_stylesheets
+        self.image_urls = set()
+        self._seen = set()
+        self._queued = []
+        self._tasks = set()
+        self._fetch = None
+
+    def add(self, urls):
+        for url in urls:
+            url = url.split('#')[0]
+            if url in self._seen or len(self._seen) >= self.max_stylesheets:
+                continue
+            self._seen.add(url)
+            if self._fetch:
+                self._start(url)
+            else:
+                self._queued.append(url)
+
+    def bind(self, fetch):
+        """fetch(url) -> awaitable of the response text (None on failure). Must be called on the event loop."""
+        self._fetch = fetch
+        queued, self._queued = self._queued, []
+        for url in queued:
+            self._start(url)
+
+    def _start(self, url):
+        task = asyncio.get_running_loop().create_task(self._load(url))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load(self, url):
+        css = await self._fetch(url)
+        if not css:
+            return
+        images, imports = parse_css(css, url)
+        self.image_urls.update(images)
+        self.add(imports)
+
+    async def join(self):
+        """Waits for every stylesheet, including @imports discovered meanwhile."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        self._fetch = None
@@ -0,0 +1,220 @@
+"""
+Headless Chrome Driver Pool for AssetFlow
+Keeps warm browsers around between scans instead of launching (and installing) Chrome every time.
+"""
+
+import os
+import threading
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import WebDriverException
+from webdriver_manager.chrome import ChromeDriverManager
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Resolved chromedriver path survives app restarts so webdriver_manager isn't queried every run
+DRIVER_PATH_CACHE = os.path.join(os.path.expanduser("~"), ".assetflow", "chromedriver_path")
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def make_chrome_options():
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--log-level=3")
+    options.add_argument(f"user-agent={USER_AGENT}")
+    # Add reliable headless options
+    options.add_argument("--disable-dev-shm-usage")
+    return options
+
+
+def resolve_driver_path(refresh=False):
+    """
+    Returns the chromedriver path, resolving it at most once per process.
+    Order: Streamlit Cloud / Linux system driver, on-disk cache, webdriver_manager.
+    refresh=True forgets the remembered path (e.g. it no longer matches the
+    installed Chrome) and asks webdriver_manager again.
+    """
+    global _driver_path
+    with _driver_path_lock:
+        if refresh:
+            _driver_path = None
+            try:
+                os.remove(DRIVER_PATH_CACHE)
+            except OSError:
+                pass
+        elif _driver_path and os.path.exists(_driver_path):
+            return _driver_path
+
+        # Check for Streamlit Cloud / Linux environment paths
+        if os.path.exists("/usr/bin/chromium") and os.path.exists("/usr/bin/chromedriver"):
+            _driver_path = "/usr/bin/chromedriver"
+            return _driver_path
+
+        if not refresh:
+            try:
+                with open(DRIVER_PATH_CACHE, 'r', encoding='utf-8') as f:
+                    cached = f.read().strip()
+                if cached and os.path.exists(cached):
+                    _driver_path = cached
+                    return _driver_path
+            except OSError:
+                pass
+
+        # Local Windows/Mac fallback
+        _driver_path = ChromeDriverManager().install()
+        try:
+            os.makedirs(os.path.dirname(DRIVER_PATH_CACHE), exist_ok=True)
+            with open(DRIVER_PATH_CACHE, 'w', encoding='utf-8') as f:
+                f.write(_driver_path)
+        except OSError as e:
+            print(f"Could not cache driver path: {e}")
+        return _driver_path
+
+
+def create_driver(options=None):
+    """
+    Starts a new headless Chrome using the cached driver path.
+    If that driver won't start (typically Chrome auto-updated past it), the
+    cached path is dropped and a matching driver is installed once.
+    """
+    options = options or make_chrome_options()
+    driver_path = resolve_driver_path()
+    if driver_path == "/usr/bin/chromedriver":
+        options.binary_location = "/usr/bin/chromium"
+        return webdriver.Chrome(service=Service(driver_path), options=options)
+    try:
+        return webdriver.Chrome(service=Service(driver_path), options=options)
+    except WebDriverException as e:
+        print(f"Chromedriver at {driver_path} failed to start ({e.msg}), re-resolving")
+        driver_path = resolve_driver_path(refresh=True)
+        return webdriver.Chrome(service=Service(driver_path), options=options)
+
+
+class DriverPool:
+    """
+    Thread-safe pool of warm headless Chrome drivers.
+
+    Drivers are reset (cookies, storage, blank page) and health-checked when
+    they come back, and recycled after max_uses scans so long-lived browsers
+    don't accumulate memory.
+    """
+
+    def __init__(self, size=2, max_uses=20, options_factory=make_chrome_options):
+        """
+        Args:
+            size: Maximum number of browsers alive at once
+            max_uses: Scans a browser serves before it is replaced
+            options_factory: Callable returning fresh ChromeOptions
+        """
+        self.size = size
+        self.max_uses = max_uses
+        self.options_factory = options_factory
+        self._idle = []
+        self._uses = {}
+        self._created = 0
+        self._cond = threading.Condition()
+
+    def warm(self, count=None):
+        """Starts browsers up front so the first scans don't pay Chrome startup."""
+        count = self.size if count is None else min(count, self.size)
+        with self._cond:
+            missing = max(0, count - self._created)
+            self._created += missing
+        for _ in range(missing):
+            try:
+                driver = create_driver(self.options_factory())
+            except Exception as e:
+                print(f"Driver warm-up failed: {e}")
+                with self._cond:
+                    self._created -= 1
+                    self._cond.notify()
+                continue
+            with self._cond:
+                self._uses[id(driver)] = 0
+                self._idle.append(driver)
+                self._cond.notify()
+
+    def acquire(self, timeout=None):
+        """Hands out an idle healthy driver, starting one if below size. Blocks when all are busy."""
+        while True:
+            with self._cond:
+                while not self._idle and self._created >= self.size:
+                    if not self._cond.wait(timeout):
+                        raise TimeoutError("No browser available in the driver pool")
+                if self._idle:
+                    driver = self._idle.pop()
+                else:
+                    self._created += 1
+                    driver = None
+
+            if driver is None:
+                try:
+                    driver = create_driver(self.options_factory())
+                except Exception:
+                    with self._cond:
+                        self._created -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._uses[id(driver)] = 0
+                return driver
+
+            if self._is_healthy(driver):
+                return driver
+            self._discard(driver)
+
+    def release(self, driver):
+        """Returns a driver after a scan; it is reset, or replaced if worn out / broken."""
+        if driver is None:
+            return
+        uses = self._uses.get(id(driver), 0) + 1
+        if uses >= self.max_uses or not self._reset(driver):
+            self._discard(driver)
+            return
+        with self._cond:
+            self._uses[id(driver)] = uses
+            self._idle.append(driver)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._discard(driver)
+
+    def _discard(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self._cond:
+            self._uses.pop(id(driver), None)
+            self._created -= 1
+            self._cond.notify()
+
+    def _is_healthy(self, driver):
+        try:
+            return driver.execute_script("return 1;") == 1 and bool(driver.window_handles)
+        except Exception:
+            return False
+
+    def _reset(self, driver):
+        """Clears cookies and storage so the next scan starts from a clean profile."""
+        try:
+            # Storage is per-origin, so clear it while still on the scanned site
+            driver.execute_script("try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}")
+            try:
+                driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            except Exception:
+                driver.delete_all_cookies()
+            driver.get("about:blank")
+            return self._is_healthy(driver)
+        except Exception:
+            return False
@@ -214,10 +214,12 @@ class PDFReportGenerator:
             for i, img in enumerate(possible_images[:6]):
                 try:
                     img_path = img['path']
-                    # Maintain Aspect Ratio logic
-                    with PILImage.open(img_path) as pil_img:
-                        w, h = pil_img.size
-                        aspect = h / float(w)
+                    # Maintain Aspect Ratio logic (dimensions recorded at download time)
+                    w, h = img.get('width'), img.get('height')
+                    if not (w and h):
+                        with PILImage.open(img_path) as pil_img:
+                            w, h = pil_img.size
+                    aspect = h / float(w)
                     
                     target_w = 2.8 * inch # Slightly smaller for grid
                     target_h = target_w * aspect
@@ -537,21 +539,26 @@ class CSVExporter:
                 
                 # File size
                 try:
-                    file_size = os.path.getsize(path) / 1024 if path and os.path.exists(path) else 0
+                    if img.get('file_size'):
+                        file_size = img['file_size'] / 1024
+                    else:
+                        file_size = os.path.getsize(path) / 1024 if path and os.path.exists(path) else 0
                     file_size_str = f"{file_size:.1f}" if file_size > 0 else "N/A"
                 except:
                     file_size_str = "N/A"
                 
-                # Dimensions and aspect ratio
+                # Dimensions and aspect ratio (recorded at download time; older scans fall back to the file)
                 try:
-                    if path and os.path.exists(path) and not path.endswith('.svg'):
+                    width, height = img.get('width'), img.get('height')
+                    if not (width and height) and path and os.path.exists(path) and not path.endswith('.svg'):
                         with PILImage.open(path) as pil_img:
                             width, height = pil_img.size
-                            dimensions = f"{width} x {height}"
-                            
-                            # Calculate aspect ratio
-                            gcd_val = self._gcd(width, height)
-                            aspect_ratio = f"{width//gcd_val}:{height//gcd_val}"
+                    if width and height:
+                        dimensions = f"{width} x {height}"
+                        
+                        # Calculate aspect ratio
+                        gcd_val = self._gcd(width, height)
+                        aspect_ratio = f"{width//gcd_val}:{height//gcd_val}"
                     else:
                         dimensions = "N/A"
                         aspect_ratio = "N/A"
@@ -0,0 +1,166 @@
+"""
+HTML Reference Extraction for AssetFlow
+Collects links, <img>/<source> srcsets, stylesheets and inline CSS from a page in one pass, using the fastest parser installed.
+"""
+
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as LexborParser
+except ImportError:
+    LexborParser = None
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+IMG_SRCSET_ATTRS = ('srcset', 'data-srcset')
+IMG_SRC_ATTRS = ('src', 'data-src', 'data-original')
+
+
+class PageRefs:
+    """
+    Raw (unresolved) references found on one page.
+
+    links:       href of every <a>
+    images:      (srcset, src) per <img> and per <picture> <source> (src is None), either may be None
+    styles:      inline style attributes and <style> blocks that contain url(
+    stylesheets: href of every <link rel="stylesheet"> (or preloaded style)
+    """
+
+    def __init__(self):
+        self.links = []
+        self.images = []
+        self.styles = []
+        self.stylesheets = []
+
+    def start(self, tag, attrs):
+        """Records one start tag; attrs is a mapping of attribute name -> value (or None)."""
+        if tag == 'a':
+            href = attrs.get('href')
+            if href is not None:
+                self.links.append(href)
+        elif tag == 'img':
+            srcset = next((attrs[a] for a in IMG_SRCSET_ATTRS if attrs.get(a)), None)
+            src = next((attrs[a] for a in IMG_SRC_ATTRS if attrs.get(a)), None)
+            if srcset or src:
+                self.images.append((srcset, src))
+        elif tag == 'source':
+            srcset = next((attrs[a] for a in IMG_SRCSET_ATTRS if attrs.get(a)), None)
+            if srcset:
+                self.images.append((srcset, None))
+        elif tag == 'link':
+            rel = (attrs.get('rel') or '').lower().split()
+            if attrs.get('href') and ('stylesheet' in rel or ('preload' in rel and attrs.get('as') == 'style')):
+                self.stylesheets.append(attrs['href'])
+        style = attrs.get('style')
+        if style and 'url(' in style:
+            self.styles.append(style)
+
+    def style_block(self, css):
+        """Records the text of a <style> element."""
+        if css and 'url(' in css:
+            self.styles.append(css)
+
+
+class HtmlBackend:
+    """Interface: parse(html) -> PageRefs. `name` identifies the backend in logs/benchmarks."""
+
+    name = "base"
+
+    def parse(self, html):
+        raise NotImplementedError
+
+
+class SelectolaxBackend(HtmlBackend):
+    """Lexbor (C) parser; one walk over the element tree in document order."""
+
+    name = "selectolax"
+    TAGS = frozenset({'a', 'img', 'source', 'link'})
+
+    def parse(self, html):
+        refs = PageRefs()
+        for node in LexborParser(html).root.traverse():
+            tag = node.tag
+            if tag == 'style':
+                refs.style_block(node.text(deep=True))
+                continue
+            attrs = node.attributes
+            if tag in self.TAGS or 'style' in attrs:
+                # Valueless attributes (<a href>) are None in lexbor, '' in lxml/bs4
+                refs.start(tag, {k: '' if v is None else v for k, v in attrs.items()})
+        return refs
+
+
+class LxmlBackend(HtmlBackend):
+    """libxml2 parser driven as a SAX-style stream: start tags go straight to PageRefs, no tree is built."""
+
+    name = "lxml"
+
+    class _Target:
+        def __init__(self, refs):
+            self.refs = refs
+            self.css = None  # Text chunks while inside <style>
+
+        def start(self, tag, attrib):
+            self.refs.start(tag, attrib)
+            if tag == 'style':
+                self.css = []
+
+        def end(self, tag):
+            if tag == 'style' and self.css is not None:
+                self.refs.style_block(''.join(self.css))
+                self.css = None
+
+        def data(self, data):
+            if self.css is not None:
+                self.css.append(data)
+
+        def close(self):
+            pass
+
+    def parse(self, html):
+        refs = PageRefs()
+        parser = etree.HTMLParser(target=self._Target(refs), recover=True)
+        # Bytes, so pages with an XML encoding declaration don't trip lxml's str check
+        parser.feed(html.encode('utf-8', 'replace') if isinstance(html, str) else html)
+        parser.close()
+        return refs
+
+
+class SoupBackend(HtmlBackend):
+    """Pure-Python fallback: one walk over a BeautifulSoup tree instead of a find_all per tag type."""
+
+    name = "bs4"
+
+    def parse(self, html):
+        refs = PageRefs()
+        for tag in BeautifulSoup(html, 'html.parser').find_all(True):
+            if tag.name == 'style':
+                refs.style_block(tag.get_text())
+                continue
+            refs.start(tag.name, {k: (' '.join(v) if isinstance(v, list) else v) for k, v in tag.attrs.items()})
+        return refs
+
+
+def available_backends():
+    """Installed backends, fastest first."""
+    backends = []
+    if LexborParser is not None:
+        backends.append(SelectolaxBackend())
+    if etree is not None:
+        backends.append(LxmlBackend())
+    backends.append(SoupBackend())
+    return backends
+
+
+def get_backend(name=None):
+    """Backend by name ('selectolax', 'lxml', 'bs4'), or the fastest installed one."""
+    backends = available_backends()
+    if name is None:
+        return backends[0]
+    for backend in backends:
+        if backend.name == name:
+            return backend
+    raise ValueError(f"HTML backend '{name}' is not installed (available: {', '.join(b.name for b in backends)})")
@@ -0,0 +1,198 @@
+"""
+Persistent HTTP Cache for AssetFlow
+Stores page and image bodies on disk and revalidates them with conditional requests on rescans.
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+class CachedResponse:
+    """Minimal response object shared by network and cache hits (mirrors the requests fields we use)."""
+
+    def __init__(self, status_code, headers, content, from_cache=False):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+
+class HttpCache:
+    """
+    On-disk HTTP cache keyed by URL.
+
+    Only responses carrying an ETag or Last-Modified validator are stored.
+    Later fetches send If-None-Match / If-Modified-Since and a 304 is served
+    from disk. Bodies are evicted least-recently-used once max_bytes is exceeded.
+    """
+
+    def __init__(self, cache_dir=".http_cache", max_bytes=512 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: Directory holding the index database and cached bodies
+            max_bytes: Total body size kept before LRU eviction kicks in
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.body_dir = os.path.join(cache_dir, "bodies")
+        os.makedirs(self.body_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                content_type TEXT,
+                size INTEGER,
+                accessed REAL
+            )
+        """)
+        self._db.commit()
+
+    def _key(self, url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _body_path(self, key):
+        return os.path.join(self.body_dir, key[:2], key)
+
+    def _lookup(self, url):
+        key = self._key(url)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, content_type FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row and os.path.exists(self._body_path(key)):
+            return key, row
+        return key, None
+
+    def conditional_headers(self, url):
+        """Validator headers for url, or {} if nothing usable is cached."""
+        _, row = self._lookup(url)
+        if not row:
+            return {}
+        etag, last_modified, _ = row
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def load(self, url):
+        """Returns the cached body as a CachedResponse (and marks it recently used), or None."""
+        key, row = self._lookup(url)
+        if not row:
+            return None
+        try:
+            with open(self._body_path(key), 'rb') as f:
+                content = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        return CachedResponse(200, {'content-type': row[2] or ''}, content, from_cache=True)
+
+    def store(self, url, headers, content):
+        """Caches a 200 response if it has a validator to revalidate it with later."""
+        headers = {k.lower(): v for k, v in headers.items()}
+        etag = headers.get('etag')
+        last_modified = headers.get('last-modified')
+        if not etag and not last_modified:
+            return
+        key = self._key(url)
+        path = self._body_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"HTTP cache write failed for {url}: {e}")
+            return
+        content_type = headers.get('content-type', '')
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, url, etag, last_modified, content_type, size, accessed) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, url, etag, last_modified, content_type, len(content), time.time())
+            )
+            self._db.commit()
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            victims = []
+            for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY accessed ASC"):
+                if total <= self.max_bytes:
+                    break
+                victims.append(key)
+                total -= size
+            self._db.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in victims])
+            self._db.commit()
+        for key in victims:
+            try:
+                os.remove(self._body_path(key))
+            except OSError:
+                pass
+
+    def get(self, session, url, timeout=5, read=None):
+        """
+        requests-based GET with revalidation. Returns a CachedResponse.
+
+        read(resp) may consume the (streamed) body itself and return the bytes,
+        or None to abandon the download; get() then returns None as well.
+        """
+        resp = session.get(url, timeout=timeout, headers=self.conditional_headers(url), stream=True)
+        if resp.status_code == 304:
+            resp.close()
+            cached = self.load(url)
+            if cached:
+                return cached
+            # Validator outlived its body: fetch unconditionally
+            resp = session.get(url, timeout=timeout, stream=True)
+        with resp:
+            if resp.status_code != 200:
+                return CachedResponse(resp.status_code, resp.headers, b'')
+            content = read(resp) if read else resp.content
+        if content is None:
+            return None
+        self.store(url, resp.headers, content)
+        return CachedResponse(resp.status_code, resp.headers, content)
+
+    async def get_async(self, session, url):
+        """
+        aiohttp-based GET with revalidation. Returns a CachedResponse.
+        Index lookups and body reads/writes (sqlite, disk) run in a worker
+        thread so they never stall the crawl's event loop.
+        """
+        conditional = await asyncio.to_thread(self.conditional_headers, url)
+        async with session.get(url, headers=conditional) as resp:
+            status = resp.status
+            headers = dict(resp.headers)
+            content = await resp.read() if status == 200 else b''
+        if status == 304:
+            cached = await asyncio.to_thread(self.load, url)
+            if cached:
+                return cached
+            async with session.get(url) as resp:
+                status = resp.status
+                headers = dict(resp.headers)
+                content = await resp.read() if status == 200 else b''
+        if status == 200:
+            await asyncio.to_thread(self.store, url, headers, content)
+        return CachedResponse(status, headers, content)
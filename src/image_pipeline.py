@@ -0,0 +1,104 @@
+"""
+Image Processing Pipeline for AssetFlow
+CPU-bound decode / size check / downscale of downloaded assets, run in worker processes so download threads stay I/O-only.
+"""
+
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+from io import BytesIO
+
+from PIL import Image
+
+from image_record import AssetImage
+
+# Smallest side an asset may have (anything smaller is an icon / blurry thumbnail)
+MIN_ASSET_SIDE = 300
+# Larger assets are downscaled to this before storing
+MAX_ASSET_SIDE = 1500
+
+# One worker pool per process and size, reused by every scan
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def accept_size(width, height):
+    # Prevent Blur: Reject anything smaller than 300px
+    return width >= MIN_ASSET_SIDE and height >= MIN_ASSET_SIDE
+
+
+def process_image(content, digest=None, url=None):
+    """
+    Decodes raw image bytes once, rejects undersized images and downscales
+    oversized ones.
+
+    Returns (content, AssetImage) where content is the bytes to store (re-encoded
+    if the image was downscaled) and the record's .path is still unset,
+    or None if the image is rejected or can't be decoded.
+    """
+    with Image.open(BytesIO(content)) as img:
+        # 1. Prevent Blur: headers that couldn't be probed are checked here
+        if not accept_size(img.width, img.height):
+            return None
+
+        # 2. Prevent "High Quality" Bloat: Resize if too huge
+        # User requested: "Don't want high quality" (interpreted as massive file size)
+        # But "Not Blur" -> So we keep reasonable HD (e.g., 1500px)
+        if img.width > MAX_ASSET_SIDE or img.height > MAX_ASSET_SIDE:
+            fmt = img.format or 'JPEG'
+            img.thumbnail((MAX_ASSET_SIDE, MAX_ASSET_SIDE), Image.Resampling.LANCZOS)
+            out = BytesIO()
+            img.save(out, format=fmt, quality=85, optimize=True)  # Good quality, efficient size
+            content = out.getvalue()
+
+        return content, AssetImage.from_image(img, None, len(content), digest, url)
+
+
+def process_batch(jobs):
+    """
+    Runs process_image over a chunk of (content, digest, url) jobs in one task,
+    so small images don't pay a round-trip to the worker each.
+    Returns one result per job (None for rejected or broken images).
+    """
+    results = []
+    for content, digest, url in jobs:
+        try:
+            results.append(process_image(content, digest, url))
+        except Exception:
+            results.append(None)
+    return results
+
+
+def _pool_context():
+    """
+    forkserver (spawn where unavailable): the app runs Streamlit, crawler and
+    download threads, and forking a multithreaded process can copy a held lock
+    into the child.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def shared_pool(workers):
+    """The process-wide ProcessPoolExecutor with `workers` workers, started on first use."""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context())
+            _pools[workers] = pool
+        return pool
+
+
+def discard_pool(pool):
+    """Shuts down a broken pool so the next shared_pool() call starts a fresh one."""
+    with _pools_lock:
+        for workers, known in list(_pools.items()):
+            if known is pool:
+                del _pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def default_workers():
+    """Worker count when none is configured: one per core."""
+    return os.cpu_count() or 1
@@ -0,0 +1,97 @@
+"""
+Image Header Probe for AssetFlow
+Reads width/height from the first bytes of PNG, JPEG, WebP and GIF files so undersized images can be skipped before the body downloads.
+"""
+
+import struct
+
+# Enough for almost every header; JPEGs with huge EXIF/ICC blocks may need more
+MAX_PROBE_BYTES = 64 * 1024
+
+# SOFn markers carry the frame size (C4 = DHT, C8 = JPG, CC = DAC are not frames)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def probe_dimensions(data):
+    """
+    Returns (width, height) parsed from the start of an image file, or None if
+    the format is unknown or more bytes are needed.
+    """
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        if len(data) >= 24 and data[12:16] == b'IHDR':
+            return struct.unpack('>II', data[16:24])
+        return None
+
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        if len(data) >= 10:
+            return struct.unpack('<HH', data[6:10])
+        return None
+
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return _probe_webp(data)
+
+    if data[:2] == b'\xff\xd8':
+        return _probe_jpeg(data)
+
+    return None
+
+
+def _probe_webp(data):
+    chunk = data[12:16]
+    if chunk == b'VP8 ' and len(data) >= 30:
+        width, height = struct.unpack('<HH', data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and len(data) >= 25:
+        bits = struct.unpack('<I', data[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X' and len(data) >= 30:
+        width = int.from_bytes(data[24:27], 'little') + 1
+        height = int.from_bytes(data[27:30], 'little') + 1
+        return width, height
+    return None
+
+
+def _probe_jpeg(data):
+    i = 2
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            return None  # Lost sync: not a well-formed marker stream
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1  # Fill byte
+            continue
+        if marker in (0x01,) or 0xD0 <= marker <= 0xD9:
+            i += 2  # Standalone marker, no length
+            continue
+        length = struct.unpack('>H', data[i + 2:i + 4])[0]
+        if marker in _JPEG_SOF:
+            if i + 9 > len(data):
+                return None
+            height, width = struct.unpack('>HH', data[i + 5:i + 9])
+            return width, height
+        i += 2 + length
+    return None
+
+
+def read_body(resp, accept_size, chunk_size=8192):
+    """
+    Reads a streamed requests response, checking the image size as soon as the
+    header has arrived. accept_size(width, height) -> bool decides whether the
+    rest of the body is worth downloading.
+
+    Returns the full body, or None if the image was rejected from its header.
+    Formats that can't be probed (SVG, unknown) are read in full.
+    """
+    head = b''
+    chunks = resp.iter_content(chunk_size=chunk_size)
+    for chunk in chunks:
+        head += chunk
+        size = probe_dimensions(head)
+        if size is not None:
+            if not accept_size(*size):
+                resp.close()
+                return None
+            break
+        if len(head) >= MAX_PROBE_BYTES:
+            break
+    return head + b''.join(chunks)
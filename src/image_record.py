@@ -0,0 +1,109 @@
+"""
+Decoded Image Records for AssetFlow
+One in-memory record per asset (bounded thumbnail + metadata) shared by scraping, analysis and export.
+"""
+
+import os
+from io import BytesIO
+
+from PIL import Image
+
+from asset_store import file_digest
+
+# Longest side of the in-memory thumbnail every analysis stage works from
+THUMBNAIL_SIDE = 768
+
+
+class AssetImage:
+    """
+    A downloaded asset decoded exactly once.
+
+    Holds a bounded RGB(A) thumbnail plus the metadata later stages need
+    (dimensions, format, byte size, digest, source URL), so colour extraction,
+    hashing, tagging and export don't reopen the file. SVGs carry no thumbnail.
+    """
+
+    def __init__(self, path, width=0, height=0, format=None, file_size=0, digest=None, url=None, thumbnail=None):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.format = format
+        self.file_size = file_size
+        self.digest = digest
+        self.url = url
+        self.thumbnail = thumbnail
+        self._encoded = {}  # (max_side, format, quality) -> bytes, see encoded()
+
+    @classmethod
+    def from_image(cls, img, path, file_size, digest=None, url=None, size=None):
+        """
+        Builds a record from an already-decoded PIL image (the image is not modified).
+        size overrides img.size when img was draft-decoded at reduced scale.
+        """
+        width, height = size or img.size
+        thumb = img.convert('RGBA' if img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info else 'RGB')
+        thumb.thumbnail((THUMBNAIL_SIDE, THUMBNAIL_SIDE), Image.Resampling.LANCZOS)
+        return cls(path, width, height, img.format, file_size, digest, url, thumb)
+
+    @classmethod
+    def from_bytes(cls, content, path, digest=None, url=None):
+        with Image.open(BytesIO(content)) as img:
+            return cls.from_image(img, path, len(content), digest, url)
+
+    @classmethod
+    def from_path(cls, path, digest=None, url=None):
+        """Decodes a file on disk once (used for stored objects and plain path inputs)."""
+        file_size = os.path.getsize(path)
+        if digest is None:
+            digest = file_digest(path)
+        if path.endswith('.svg'):
+            return cls(path, format='SVG', file_size=file_size, digest=digest, url=url)
+        with Image.open(path) as img:
+            size = img.size
+            img.draft('RGB', (THUMBNAIL_SIDE, THUMBNAIL_SIDE))  # JPEG: decode straight at thumbnail scale
+            return cls.from_image(img, path, file_size, digest, url, size=size)
+
+    def encoded(self, max_side, format='JPEG', quality=80):
+        """
+        The thumbnail re-encoded at most max_side px (e.g. for upload to a vision
+        model). Reuses the decoded pixels; each variant is encoded once per record.
+        """
+        key = (max_side, format, quality)
+        if key not in self._encoded:
+            img = self.thumbnail.copy()
+            img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            if format == 'JPEG' and img.mode != 'RGB':
+                # JPEG has no alpha: flatten transparent areas onto white
+                background = Image.new('RGB', img.size, (255, 255, 255))
+                background.paste(img, mask=img.getchannel('A') if img.mode == 'RGBA' else None)
+                img = background
+            out = BytesIO()
+            img.save(out, format=format, quality=quality)
+            self._encoded[key] = out.getvalue()
+        return self._encoded[key]
+
+    @property
+    def is_vector(self):
+        return self.thumbnail is None
+
+    @property
+    def resolution(self):
+        return f"{self.width}x{self.height}" if self.width and self.height else "-"
+
+    def metadata(self):
+        """Plain-data fields copied into analysis results (safe to keep in session state)."""
+        return {
+            "width": self.width,
+            "height": self.height,
+            "resolution": self.resolution,
+            "format": self.format,
+            "file_size": self.file_size,
+            "url": self.url or "N/A",
+        }
+
+
+def as_record(item):
+    """Accepts an AssetImage or a path and returns an AssetImage."""
+    if isinstance(item, AssetImage):
+        return item
+    return AssetImage.from_path(item)
@@ -0,0 +1,113 @@
+"""
+Perceptual Near-Duplicate Detection for AssetFlow
+Collapses resized / re-encoded copies of the same image (dHash + BK-tree) so each is analyzed once.
+"""
+
+import numpy as np
+from PIL import Image
+
+# Hashes this many bits apart (out of 64) or closer count as the same picture
+DEFAULT_MAX_DISTANCE = 6
+# dHash only sees luminance gradients, so flat images of different colours
+# hash alike; their mean colours must also be this close (RGB distance)
+MAX_MEAN_COLOR_DISTANCE = 40
+
+
+def dhash(img, hash_size=8):
+    """
+    Difference hash: grayscale, shrink to (hash_size + 1) x hash_size and
+    record whether each pixel is brighter than its right neighbour.
+    Returns a hash_size * hash_size bit int (64 bits by default).
+    """
+    small = img.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def mean_color(img):
+    return tuple(np.asarray(img.convert('RGB').resize((8, 8), Image.Resampling.BOX), dtype=np.float32).reshape(-1, 3).mean(axis=0))
+
+
+def record_fingerprint(record):
+    """Returns (dhash, mean_color, pixel_area) for an AssetImage, or (None, None, 0) for vectors (SVG)."""
+    if record.is_vector:
+        return None, None, 0
+    return dhash(record.thumbnail), mean_color(record.thumbnail), record.width * record.height
+
+
+class BKTree:
+    """Burkhard-Keller tree over Hamming distance: radius queries without comparing every hash."""
+
+    def __init__(self):
+        self._root = None  # [hash, value, {distance: child}]
+
+    def add(self, hash_value, value):
+        node = [hash_value, value, {}]
+        if self._root is None:
+            self._root = node
+            return
+        current = self._root
+        while True:
+            d = hamming(hash_value, current[0])
+            child = current[2].get(d)
+            if child is None:
+                current[2][d] = node
+                return
+            current = child
+
+    def find(self, hash_value, max_distance, accept=None):
+        """
+        Returns (distance, value) of the closest entry within max_distance, or None.
+        accept(value) can veto candidates.
+        """
+        best = None
+        stack = [self._root] if self._root else []
+        while stack:
+            node = stack.pop()
+            d = hamming(hash_value, node[0])
+            if d <= max_distance and (best is None or d < best[0]) and (accept is None or accept(node[1])):
+                best = (d, node[1])
+            for edge, child in node[2].items():
+                if d - max_distance <= edge <= d + max_distance:
+                    stack.append(child)
+        return best
+
+
+class NearDuplicateIndex:
+    """
+    Online clustering of images by perceptual hash.
+
+    Each cluster keeps one representative: the member with the most pixels.
+    add() tells the caller whether an image is new, a smaller duplicate, or a
+    larger duplicate that should take over its cluster.
+    """
+
+    def __init__(self, max_distance=DEFAULT_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._tree = BKTree()
+
+    def add(self, hash_value, color, area, key):
+        """
+        Returns (status, cluster) where status is 'new', 'duplicate' or 'replaces'.
+        cluster is a dict {'key', 'area'} describing the cluster representative
+        (before replacement for 'replaces').
+        """
+        def same_colors(cluster):
+            return sum((a - b) ** 2 for a, b in zip(color, cluster['color'])) ** 0.5 <= MAX_MEAN_COLOR_DISTANCE
+
+        match = self._tree.find(hash_value, self.max_distance, accept=same_colors)
+        if match is None:
+            self._tree.add(hash_value, {'key': key, 'area': area, 'color': color})
+            return 'new', None
+        cluster = match[1]
+        if area > cluster['area']:
+            previous = dict(cluster)
+            cluster['key'] = key
+            cluster['area'] = area
+            return 'replaces', previous
+        return 'duplicate', cluster
@@ -0,0 +1,213 @@
+"""
+Dominant Color Extraction for AssetFlow
+Vectorized k-means over a fixed pixel sample (NumPy), batched across images, replacing ColorThief's pure-Python MMCQ,
+plus CIELAB ΔE clustering to merge shades across a whole scan.
+"""
+
+import numpy as np
+
+# Pixels clustered per image, whatever its size
+SAMPLE_PIXELS = 8192
+MAX_ITERATIONS = 12
+# Images clustered together per vectorized pass (bounds the B x N x k distance buffer)
+BATCH_IMAGES = 32
+# Pixels more transparent than this, or whiter than WHITE_CUTOFF on every channel, are ignored (as ColorThief does)
+MIN_ALPHA = 125
+WHITE_CUTOFF = 250
+# Colors closer than this (CIE76 ΔE, ~2.3 is just noticeable) count as one shade in the global palette
+MERGE_DELTA_E = 10
+
+
+def to_hex(rgb):
+    r, g, b = (int(round(c)) for c in rgb)
+    return '#{:02x}{:02x}{:02x}'.format(r, g, b)
+
+
+def sample_pixels(img, sample_size=SAMPLE_PIXELS):
+    """
+    Returns an (N, 3) float32 array of opaque, non-white RGB pixels taken on an
+    even stride, with N <= sample_size.
+    """
+    has_alpha = img.mode == 'RGBA'
+    pixels = np.asarray(img if has_alpha or img.mode == 'RGB' else img.convert('RGB'))
+    pixels = pixels.reshape(-1, pixels.shape[-1])
+
+    step = max(1, len(pixels) // sample_size)
+    pixels = pixels[::step][:sample_size]
+
+    keep = ~(pixels[:, :3] > WHITE_CUTOFF).all(axis=1)
+    if has_alpha:
+        keep &= pixels[:, 3] >= MIN_ALPHA
+    return pixels[keep, :3].astype(np.float32)
+
+
+def _initial_centers(pixels, mask, k):
+    """
+    Deterministic k-means++ seeding, per image: each next center is the pixel
+    farthest from the ones already chosen. pixels is (B, N, 3), mask (B, N).
+    """
+    rows = np.arange(len(pixels))
+    valid = mask.sum(axis=1, keepdims=True).clip(min=1)
+    centers = np.empty((len(pixels), k, 3), dtype=np.float32)
+    centers[:, 0] = (pixels * mask[..., None]).sum(axis=1) / valid
+    distances = np.where(mask, ((pixels - centers[:, :1]) ** 2).sum(axis=2), -1)
+    for j in range(1, k):
+        centers[:, j] = pixels[rows, distances.argmax(axis=1)]
+        distances = np.minimum(distances, np.where(mask, ((pixels - centers[:, j:j + 1]) ** 2).sum(axis=2), -1))
+    return centers
+
+
+def _assign(pixels, centers):
+    # Squared distances via |c|^2 - 2 p.c (|p|^2 is constant per pixel), keeps memory at B x N x k
+    distances = (centers ** 2).sum(axis=2)[:, None, :] - 2 * (pixels @ centers.transpose(0, 2, 1))
+    return distances.argmin(axis=2)
+
+
+def _cluster_totals(pixels, mask, centers):
+    """Assigns pixels to their nearest center. Returns (counts (B, k), per-channel sums (B, k, 3))."""
+    batch, k = centers.shape[:2]
+    # One bincount over the whole batch: cluster j of image b lives in slot b * k + j
+    slots = (_assign(pixels, centers) + (np.arange(batch) * k)[:, None])[mask]
+    counts = np.bincount(slots, minlength=batch * k).reshape(batch, k)
+    sums = np.stack([np.bincount(slots, weights=pixels[..., c][mask], minlength=batch * k) for c in range(3)], axis=1)
+    return counts, sums.reshape(batch, k, 3)
+
+
+def batch_kmeans(pixels, mask, k, max_iterations=MAX_ITERATIONS):
+    """
+    Lloyd's k-means run on every image of a batch at once.
+
+    pixels is a contiguous (B, N, 3) buffer and mask (B, N) marks the real
+    pixels of each row (images contribute different sample counts).
+    Images drop out of the pass once their centers stop moving.
+    Returns (centers (B, k, 3), counts (B, k)).
+    """
+    centers = _initial_centers(pixels, mask, k)
+    active = np.arange(len(pixels))
+    for _ in range(max_iterations):
+        current = centers[active]
+        counts, sums = _cluster_totals(pixels[active], mask[active], current)
+        filled = counts > 0
+        updated = current.copy()
+        updated[filled] = sums[filled] / counts[filled][:, None]
+        centers[active] = updated
+        active = active[np.abs(updated - current).max(axis=(1, 2)) >= 0.5]
+        if len(active) == 0:
+            break
+
+    counts, _ = _cluster_totals(pixels, mask, centers)
+    return centers, counts
+
+
+def extract_palettes(images, count=5, sample_size=SAMPLE_PIXELS):
+    """
+    Dominant colors of many decoded PIL images in one vectorized pass.
+
+    Pixel samples of up to BATCH_IMAGES images are packed into one buffer and
+    clustered together. Returns one (hex_colors, shares) pair per image, most
+    common color first; shares are the fraction of the image's (sampled)
+    pixels each color covers. Images with no usable pixels give ([], []).
+    """
+    samples = [sample_pixels(img, sample_size) for img in images]
+    palettes = []
+    for start in range(0, len(samples), BATCH_IMAGES):
+        chunk = samples[start:start + BATCH_IMAGES]
+        width = max(len(s) for s in chunk)
+        if width == 0:
+            palettes.extend(([], []) for _ in chunk)
+            continue
+        pixels = np.zeros((len(chunk), width, 3), dtype=np.float32)
+        mask = np.zeros((len(chunk), width), dtype=bool)
+        for i, sample in enumerate(chunk):
+            pixels[i, :len(sample)] = sample
+            mask[i, :len(sample)] = True
+
+        centers, counts = batch_kmeans(pixels, mask, count)
+        for i, sample in enumerate(chunk):
+            order = [j for j in np.argsort(-counts[i], kind='stable') if counts[i, j] > 0]
+            total = len(sample)
+            palettes.append(([to_hex(centers[i, j]) for j in order], [float(counts[i, j] / total) for j in order]))
+    return palettes
+
+
+def extract_palette(img, count=5, sample_size=SAMPLE_PIXELS):
+    """
+    Returns up to count dominant colors of a decoded PIL image as hex strings,
+    most common first.
+    """
+    return extract_palettes([img], count, sample_size)[0][0]
+
+
+def hex_to_rgb(colors):
+    """(N,) hex strings -> (N, 3) float array."""
+    return np.array([[int(c[i:i + 2], 16) for i in (1, 3, 5)] for c in colors], dtype=np.float64).reshape(-1, 3)
+
+
+def rgb_to_lab(rgb):
+    """(N, 3) sRGB in 0-255 -> (N, 3) CIELAB (D65)."""
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    linear = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+    xyz = linear @ _SRGB_TO_XYZ.T / _D65_WHITE
+    f = np.where(xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    return np.stack([116 * f[:, 1] - 16, 500 * (f[:, 0] - f[:, 1]), 200 * (f[:, 1] - f[:, 2])], axis=1)
+
+
+_SRGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+_D65_WHITE = np.array([0.95047, 1.0, 1.08883])
+
+
+def cluster_colors(colors, weights=None, max_delta_e=MERGE_DELTA_E):
+    """
+    Merges perceptually similar colors (CIE76 ΔE in CIELAB) into clusters.
+
+    Colors are visited heaviest first; each joins the nearest cluster whose
+    representative is within max_delta_e, otherwise it starts a new cluster.
+    Representatives are looked up in a uniform Lab grid with max_delta_e cells,
+    so each color only checks its 27 neighbouring cells.
+
+    Returns [(representative_hex, total_weight)], heaviest first. The
+    representative is the cluster's heaviest member, so it is a real color.
+    """
+    if not colors:
+        return []
+    if weights is None:
+        weights = [1] * len(colors)
+
+    # Exact repeats (same hex from many images) collapse before any distance work
+    unique, inverse = np.unique(np.array([c.lower() for c in colors]), return_inverse=True)
+    mass = np.bincount(inverse, weights=np.asarray(weights, dtype=np.float64), minlength=len(unique))
+    lab = rgb_to_lab(hex_to_rgb(unique))
+    cells = np.floor(lab / max_delta_e).astype(np.int64)
+
+    grid = {}  # cell -> [cluster ids]
+    leaders = []  # cluster id -> (L, a, b) of its representative
+    clusters = []  # cluster id -> [hex, weight]
+    limit = max_delta_e ** 2
+    # Plain Python floats: per-color NumPy calls would dominate this loop
+    lab, cells, mass = lab.tolist(), cells.tolist(), mass.tolist()
+    for i in np.argsort(-np.asarray(mass), kind='stable').tolist():
+        l, a, b = lab[i]
+        cx, cy, cz = cells[i]
+        best, best_distance = None, limit
+        for x in (cx - 1, cx, cx + 1):
+            for y in (cy - 1, cy, cy + 1):
+                for z in (cz - 1, cz, cz + 1):
+                    for cid in grid.get((x, y, z), ()):
+                        ll, la, lb = leaders[cid]
+                        d = (ll - l) ** 2 + (la - a) ** 2 + (lb - b) ** 2
+                        if d <= best_distance:
+                            best, best_distance = cid, d
+        if best is None:
+            grid.setdefault((cx, cy, cz), []).append(len(clusters))
+            leaders.append((l, a, b))
+            clusters.append([str(unique[i]), mass[i]])
+        else:
+            clusters[best][1] += mass[i]
+
+    clusters.sort(key=lambda c: -c[1])
+    return [tuple(c) for c in clusters]
+
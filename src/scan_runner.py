@@ -0,0 +1,76 @@
+"""
+Background Scan Runner for AssetFlow
+Runs one scrape -> analyze pipeline per target on its own thread so Battle Mode can scan both brands at once.
+"""
+
+import threading
+
+from scraper import AssetScraper
+from analysis import AssetAnalyzer
+
+
+class TargetScan:
+    """
+    Scrapes and analyzes a single target on a background thread.
+
+    Each scan owns its own AssetScraper (driver + HTTP session) and AssetAnalyzer,
+    so nothing is shared between concurrent targets; the driver may be borrowed
+    from a shared DriverPool. Streamlit calls must stay on the script thread:
+    the UI polls snapshot() instead of receiving callbacks.
+    """
+
+    def __init__(self, url, label, api_key=None, max_pages=15, download_folder="assets", driver_pool=None, http_cache=None, analysis_cache=None):
+        self.url = url
+        self.label = label
+        self.max_pages = max_pages
+        self.scraper = AssetScraper(download_folder=download_folder, driver_pool=driver_pool, http_cache=http_cache)
+        self.analyzer = AssetAnalyzer(api_key=api_key, cache=analysis_cache)
+
+        self.results = []
+        self.fonts = {}
+        self.message = "Queued..."
+        self.error = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"scan-{self.label}", daemon=True)
+        self._thread.start()
+        return self
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def join(self, timeout=None):
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _set_message(self, msg):
+        with self._lock:
+            self.message = msg
+
+    def _run(self):
+        try:
+            stream = self.scraper.scrape_stream(self.url, max_pages=self.max_pages, progress_callback=self._set_message)
+            for result in self.analyzer.analyze_stream(stream):
+                with self._lock:
+                    self.results.append(result)
+                    self.message = f"Analyzed {len(self.results)} assets..."
+            with self._lock:
+                self.fonts = self.scraper.fonts
+                self.message = f"Done ({len(self.results)} assets)"
+        except Exception as e:
+            with self._lock:
+                self.error = e
+                self.message = f"Failed: {e}"
+
+    def snapshot(self):
+        """Thread-safe view of the scan: (results, message, progress 0-1)."""
+        with self._lock:
+            results = list(self.results)
+            message = self.message
+        total = max(self.scraper.download_total, len(results))
+        progress = len(results) / total if total else 0.0
+        if not self.is_running():
+            progress = 1.0
+        return results, message, progress
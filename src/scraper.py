@@ -1,140 +1,220 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
 import requests
 import os
-import time
 from urllib.parse import urljoin, urlparse
-from PIL import Image
-from io import BytesIO
 import concurrent.futures
-from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+import threading
+from crawler import AsyncCrawler
+from css_assets import StylesheetCollector, parse_css
+from html_extract import get_backend
+from url_rewrite import high_res_url
+from driver_pool import USER_AGENT, make_chrome_options, create_driver
+from asset_store import AssetStore, content_digest
+from http_cache import CachedResponse
+from image_probe import read_body
+from image_record import AssetImage
+from image_pipeline import accept_size, process_batch, shared_pool, discard_pool, default_workers
+
+# Scroll-driven lazy-load detection: resolves once no new images have appeared
+# (no <img>/<source> added, no src/srcset swapped, no rendered <img> still
+# loading) for the idle window. Style animations, hidden lazy images and
+# background requests (analytics, video segments) don't count as activity.
+SCROLL_UNTIL_IDLE_JS = """
+const done = arguments[arguments.length - 1];
+const maxTime = arguments[0], idleTime = arguments[1];
+const start = Date.now();
+let lastChange = start;
+let lastImages = document.images.length;
+let lastHeight = document.body.scrollHeight;
+
+function isImageNode(node) {
+    return node.nodeType === 1 && (node.matches('img, source') || node.querySelector('img, source') !== null);
+}
+
+const observer = new MutationObserver((mutations) => {
+    for (const m of mutations) {
+        if (m.type === 'attributes' ? isImageNode(m.target) : Array.from(m.addedNodes).some(isImageNode)) {
+            lastChange = Date.now();
+            return;
+        }
+    }
+});
+observer.observe(document.body, {childList: true, subtree: true, attributes: true, attributeFilter: ['src', 'srcset']});
+
+function loading() {
+    // Unrendered images (display:none, lazy ones never scrolled into layout) will not load: ignore them
+    for (const img of document.images) { if (!img.complete && img.getClientRects().length) return true; }
+    return false;
+}
+
+function step() {
+    window.scrollBy(0, window.innerHeight);
+    const now = Date.now();
+    const images = document.images.length;
+    const height = document.body.scrollHeight;
+    if (images !== lastImages || height !== lastHeight) {
+        lastImages = images; lastHeight = height;
+        lastChange = now;
+    }
+    const atBottom = window.innerHeight + window.scrollY >= height - 2;
+    const idle = now - lastChange >= idleTime && !loading();
+    if ((atBottom && idle) || now - start > maxTime) {
+        observer.disconnect();
+        done(images);
+        return;
+    }
+    setTimeout(step, 100);
+}
+step();
+"""
 
 class AssetScraper:
-    def __init__(self, download_folder="assets"):
+    def __init__(self, download_folder="assets", max_concurrency=20, per_host_limit=5, max_depth=3, driver_pool=None, http_cache=None,
+                 image_workers=None, image_chunk_size=4, html_backend=None):
         self.download_folder = download_folder
-        self.options = Options()
-        self.options.add_argument("--headless=new")
-        self.options.add_argument("--disable-gpu")
-        self.options.add_argument("--no-sandbox")
-        self.options.add_argument("--window-size=1920,1080")
-        self.options.add_argument("--log-level=3")
-        self.options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+        self.max_depth = max_depth
+        # Async crawl limits (pages in flight overall / per host)
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        # Lazy-load scrolling: hard cap and "nothing new happened" window
+        self.scroll_max_seconds = 15
+        self.scroll_idle_ms = 400
+        self.options = make_chrome_options()
         
+        # Optional DriverPool: borrow a warm browser instead of launching Chrome per scan
+        self.driver_pool = driver_pool
+        # Optional HttpCache: pages and images are revalidated instead of re-downloaded
+        self.http_cache = http_cache
+        # Decode / resize runs in worker processes (None = one per core, 0 = inline).
+        # Up to image_chunk_size images are sent per task while the workers are busy.
+        self.image_workers = image_workers
+        self.image_chunk_size = image_chunk_size
+        # Page parser: 'selectolax', 'lxml' or 'bs4' (None = fastest installed)
+        self.html_backend = get_backend(html_backend)
+        # Downloads are stored once by content hash and linked into each scan folder
+        self.asset_store = AssetStore(os.path.join(download_folder, ".store"))
+        self._scan_digests = set()
+        self._digest_lock = threading.Lock()
         self.driver = None
-        self.visited_urls = set()
+        self.fonts = {}
+        self.download_total = 0
         self.session = requests.Session()
         self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+            "User-Agent": USER_AGENT
         })
 
-        # Add reliable headless options
-        self.options.add_argument("--disable-dev-shm-usage")
-
     def _init_driver(self):
         if not self.driver:
-            # Check for Streamlit Cloud / Linux environment paths
-            if os.path.exists("/usr/bin/chromium") and os.path.exists("/usr/bin/chromedriver"):
-                self.options.binary_location = "/usr/bin/chromium"
-                service = Service("/usr/bin/chromedriver")
+            if self.driver_pool:
+                self.driver = self.driver_pool.acquire()
             else:
-                # Local Windows/Mac fallback
-                self.options.binary_location = None
-                service = Service(ChromeDriverManager().install())
-                
-            self.driver = webdriver.Chrome(service=service, options=self.options)
+                self.driver = create_driver(self.options)
 
-    def scrape(self, start_url, max_pages=15, progress_callback=None):
+    def _release_driver(self):
+        if not self.driver:
+            return
+        if self.driver_pool:
+            self.driver_pool.release(self.driver)
+        else:
+            self.driver.quit()
+        self.driver = None
+
+    def scrape(self, start_url, max_pages=15, progress_callback=None, max_depth=None):
         """
         Crawls the website starting from start_url.
+        Pages are visited breadth-first up to max_depth links away from the homepage.
+        Returns (AssetImage records, fonts); each record's .path is the saved file.
+        """
+        downloaded = list(self.scrape_stream(start_url, max_pages, progress_callback, max_depth))
+        return downloaded, self.fonts
+
+    def scrape_stream(self, start_url, max_pages=15, progress_callback=None, max_depth=None):
         """
+        Same as scrape(), but yields each AssetImage as soon as it lands on disk
+        so analysis can start while the remaining downloads are in flight.
+        Fonts are available on self.fonts once the first path is yielded.
+        """
+        image_urls, self.fonts = self._crawl(start_url, max_pages, progress_callback, max_depth)
+        self.download_total = len(image_urls)
+        
+        # 2. Download Phase
+        if progress_callback: progress_callback(f"Downloading {len(image_urls)} assets...")
+        yield from self._iter_downloads(image_urls, start_url)
+
+    def _crawl(self, start_url, max_pages, progress_callback=None, max_depth=None):
+        """Loads the homepage in Selenium, then crawls sub-pages. Returns (image_urls, fonts)."""
+        if max_depth is None:
+            max_depth = self.max_depth
         self._init_driver()
         
         # 1. Scraping Phase
         if progress_callback: progress_callback(f"Starting Smart Crawl (Max {max_pages} pages)...")
         
-        # Initial Selenium load for homepage (critical for JS nav)
-        self.driver.get(start_url)
-        self._scroll_page()
-        homepage_soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-        
-        # Extract Fonts from homepage (best source)
-        fonts = self._extract_fonts()
+        try:
+            # Initial Selenium load for homepage (critical for JS nav)
+            self.driver.get(start_url)
+            self._scroll_page()
+            homepage_refs = self.html_backend.parse(self.driver.page_source)
+            
+            # Extract Fonts from homepage (best source)
+            fonts = self._extract_fonts()
+        finally:
+            # The browser is only needed for the homepage; hand it back before crawling
+            self._release_driver()
         
-        # Queue for crawling
-        queue = deque([start_url])
-        self.visited_urls = {start_url}
         all_image_urls = set()
         
         # Get initial images from home
-        home_imgs = self._extract_image_urls(homepage_soup, start_url)
+        home_imgs = self._extract_image_urls(homepage_refs, start_url)
         all_image_urls.update(home_imgs)
         
-        # Get links
-        links = self._extract_internal_links(homepage_soup, start_url)
-        # Prioritize relevant pages
-        for link in links:
-            if link not in self.visited_urls:
-                queue.append(link)
-                self.visited_urls.add(link)
+        # Get links (depth 1); the frontier orders them by depth and URL pattern
+        links = self._extract_internal_links(homepage_refs, start_url)
         
-        # Crawl Loop (Limit concurrent pages to avoid timeouts, but use threads)
-        pages_scanned = 1
+        # Linked stylesheets are fetched once each, alongside the page crawl
+        stylesheets = StylesheetCollector()
+        stylesheets.add(self._extract_stylesheets(homepage_refs, start_url))
         
-        if progress_callback: progress_callback(f"Homepage scanned. Found {len(queue)} links. Crawling...")
+        # Crawl Loop (async engine: one event loop instead of one thread per page)
+        if progress_callback: progress_callback(f"Homepage scanned. Found {len(links)} links. Crawling...")
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_url = {}
+        def handle_page(url, html, depth):
+            refs = self.html_backend.parse(html)
+            new_imgs = self._extract_image_urls(refs, url)
+            all_image_urls.update(new_imgs)
+            stylesheets.add(self._extract_stylesheets(refs, url))
             
-            # Submit initial batch
-            while queue and pages_scanned < max_pages:
-                url = queue.popleft()
-                future_to_url[executor.submit(self._fetch_page_fast, url)] = url
-                pages_scanned += 1
-                
-            for future in concurrent.futures.as_completed(future_to_url):
-                url = future_to_url[future]
-                try:
-                    soup = future.result()
-                    if soup:
-                        new_imgs = self._extract_image_urls(soup, url)
-                        all_image_urls.update(new_imgs)
-                        
-                        # Add more links if we still need pages? 
-                        # (Optional: for deep crawl. Skipping for speed to focus on depth 1)
-                        
-                        if progress_callback: 
-                            progress_callback(f"Scanned: {urlparse(url).path[:20]}... ({len(all_image_urls)} assets found)")
-                except Exception as e:
-                    pass
-                    
-        # 2. Download Phase
-        if progress_callback: progress_callback(f"Downloading {len(all_image_urls)} assets...")
-        downloaded_paths = self._download_images_concurrent(list(all_image_urls), start_url)
+            if progress_callback: 
+                progress_callback(f"Scanned: {urlparse(url).path[:20]}... ({len(all_image_urls)} assets found)")
+            
+            # Deeper pages are only worth parsing for links if they can still be queued
+            if depth < max_depth:
+                return self._extract_internal_links(refs, url, domain_of=start_url)
+            return None
         
-        self.driver.quit()
-        self.driver = None
+        crawler = AsyncCrawler(
+            headers=dict(self.session.headers),
+            max_concurrency=self.max_concurrency,
+            per_host_limit=self.per_host_limit,
+            http_cache=self.http_cache
+        )
+        crawler.run(links, max_pages - 1, handle_page, max_depth=max_depth, visited=[start_url], stylesheets=stylesheets)
         
-        return downloaded_paths, fonts
-
-    def _fetch_page_fast(self, url):
-        """Fetches page using Requests (much faster than Selenium)."""
-        try:
-            resp = self.session.get(url, timeout=5)
-            if resp.status_code == 200:
-                return BeautifulSoup(resp.text, 'html.parser')
-        except:
-            return None
-        return None
+        css_urls = set(stylesheets.image_urls)
+        css_urls.update(self._try_get_high_res(u) for u in stylesheets.image_urls)
+        all_image_urls.update(self._filter_image_urls(css_urls))
+        
+        return list(all_image_urls), fonts
 
-    def _extract_internal_links(self, soup, base_url):
+    def _extract_internal_links(self, refs, base_url, domain_of=None):
+        """
+        Same-site links from a page's PageRefs, resolved against base_url (the page
+        they were found on). domain_of sets the site to stay on (default: base_url).
+        """
         links = set()
-        domain = urlparse(base_url).netloc.replace('www.', '')
+        domain = urlparse(domain_of or base_url).netloc.replace('www.', '')
         
-        for a in soup.find_all('a', href=True):
-            href = a['href']
+        for href in refs.links:
             full_url = urljoin(base_url, href)
             parsed = urlparse(full_url)
             
@@ -169,47 +249,36 @@ class AssetScraper:
             return {'headers': 'Unknown', 'body': 'Unknown'}
 
     def _scroll_page(self):
+        """
+        Scrolls until lazy-loading settles instead of sleeping for a fixed time.
+        Stops once the page bottom is reached, no images are still loading, and
+        neither the DOM nor the network has changed for scroll_idle_ms.
+        """
         try:
-            for i in range(3): # reduced scroll for speed
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight * arguments[0] / 3);", i + 1)
-                time.sleep(0.5)
+            self.driver.set_script_timeout(self.scroll_max_seconds + 5)
+            self.driver.execute_async_script(SCROLL_UNTIL_IDLE_JS, self.scroll_max_seconds * 1000, self.scroll_idle_ms)
         except: pass
 
     def _try_get_high_res(self, url):
         """
-        Attempts to convert a thumbnail URL into a high-res URL 
-        by stripping common resizing patterns.
+        Attempts to convert a thumbnail URL into a high-res URL
+        (per-CDN rewrite rules, memoized; see url_rewrite).
         """
-        import re
-        
-        # 1. Remove dimensions like 100x100, 50x50, etc.
-        # e.g. image-100x100.jpg -> image.jpg
-        # Expanded to catch more variants like _1024x, x1024, etc.
-        new_url = re.sub(r'[-_]\d{2,}x\d*', '', url) # catch _500x, _500x500
-        new_url = re.sub(r'x\d{2,}[-_]', '', new_url) # catch x500_
-        
-        # 2. Remove Shopify/CDN resize params and common quality reducers
-        # e.g. /products/image_200x.jpg?v=123 -> /products/image.jpg?v=123
-        new_url = re.sub(r'_(small|thumb|medium|large|grande|icon|square|compact|portrait|landscape|cropped|\d+x)\.', '.', new_url, flags=re.IGNORECASE)
-        
-        if new_url != url: return new_url
-        
-        # 3. Strip query params that resize
-        if '?' in url:
-            base, qs = url.split('?', 1)
-            # If query has 'width=', 'w=', 'height=', 'h=', drop common resize params
-            if any(x in qs for x in ['width=', 'w=', 'height=', 'h=', 'size=', 'quality=', 'q=']):
-                # Return base url without params is usually safer for getting original
-                return base 
-                
-        return url
+        return high_res_url(url)
 
-    def _extract_image_urls(self, soup, base_url):
+    def _extract_stylesheets(self, refs, base_url):
+        """Absolute URLs of the stylesheets a page links or @imports from <style> blocks."""
+        sheets = {urljoin(base_url, href) for href in refs.stylesheets}
+        for style in refs.styles:
+            sheets.update(parse_css(style, base_url)[1])
+        return [u for u in sheets if u.startswith('http')]
+
+    def _extract_image_urls(self, refs, base_url):
+        """Image URLs from a page's PageRefs (see html_extract)."""
         urls = set()
-        # <img> tags
-        for img in soup.find_all('img'):
+        # <img> tags and <picture> <source> candidates
+        for srcset, src in refs.images:
             # Check srcset first (usually has high-res)
-            srcset = img.get('srcset') or img.get('data-srcset')
             if srcset:
                 try:
                     candidates = srcset.split(',')
@@ -230,7 +299,6 @@ class AssetScraper:
                 except: pass
 
             # Fallback to src/data-src
-            src = img.get('src') or img.get('data-src') or img.get('data-original')
             if src:
                 full = urljoin(base_url, src)
                 if full.startswith('http'): 
@@ -238,40 +306,143 @@ class AssetScraper:
                     # Always try to "upgrade" to high-res
                     urls.add(self._try_get_high_res(full))
                 
-        # CSS Backgrounds
-        for tag in soup.find_all(style=True):
-            if 'url(' in tag['style']:
-                try:
-                    part = tag['style'].split('url(')[1].split(')')[0].strip('"\'')
-                    full = urljoin(base_url, part)
-                    urls.add(full)
-                    urls.add(self._try_get_high_res(full))
-                except: pass
+        # CSS Backgrounds (style attributes and <style> blocks; every url() and image-set() entry)
+        for style in refs.styles:
+            for full in parse_css(style, base_url)[0]:
+                urls.add(full)
+                urls.add(self._try_get_high_res(full))
                 
+        return self._filter_image_urls(urls)
+
+    def _filter_image_urls(self, urls):
         # Validation
         valid_exts = ('.jpg', '.jpeg', '.png', '.webp', '.svg', '.gif')
         return [u for u in urls if any(u.lower().endswith(ext) for ext in valid_exts) or 'images' in u]
 
-    def _download_images_concurrent(self, urls, base_url):
-        paths = []
+    def _iter_downloads(self, urls, base_url):
+        """
+        Downloads urls on a thread pool and hands the bytes to the image process
+        pool, yielding each AssetImage as soon as it is processed and stored.
+        """
         domain_name = urlparse(base_url).netloc.replace('www.', '').split('.')[0]
         save_dir = os.path.join(self.download_folder, domain_name)
         os.makedirs(save_dir, exist_ok=True)
+        self._scan_digests = set()
         
+        image_pool, workers = self._start_image_pool()
         with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            futures = {executor.submit(self._download_single_image, url, save_dir, i): url for i, url in enumerate(urls)}
+            downloads = {executor.submit(self._download_single_image, url, save_dir, i) for i, url in enumerate(urls)}
+            processing = {}  # future -> chunk of download items
+            chunk = []
             
-            for future in concurrent.futures.as_completed(futures):
-                path = future.result()
-                if path:
-                    paths.append(path)
+            try:
+                while downloads or processing or chunk:
+                    # Send a chunk when it's full, when nothing else will arrive, or when a worker is idle
+                    if chunk and (len(chunk) >= self.image_chunk_size or not downloads or len(processing) < workers):
+                        jobs = [(content, digest, url) for url, digest, ext, content, object_path in chunk]
+                        future = None
+                        if image_pool:
+                            try:
+                                future = image_pool.submit(process_batch, jobs)
+                            except BrokenProcessPool:
+                                image_pool = self._drop_image_pool(image_pool)
+                                workers = 1
+                        if future is None:
+                            future = concurrent.futures.Future()
+                            future.set_result(process_batch(jobs))
+                        processing[future] = chunk
+                        chunk = []
+                        continue
                     
-        return paths
+                    done, _ = concurrent.futures.wait(set(downloads) | set(processing), return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        if future in downloads:
+                            downloads.discard(future)
+                            item = future.result()
+                            if isinstance(item, AssetImage):
+                                yield item  # SVG: nothing to decode
+                            elif item:
+                                chunk.append(item)
+                            continue
+                        
+                        items = processing.pop(future)
+                        try:
+                            results = future.result()
+                        except BrokenProcessPool:
+                            # A worker died (OOM, killed): finish this chunk and the rest of the scan here
+                            image_pool = self._drop_image_pool(image_pool)
+                            workers = 1
+                            results = process_batch([(content, digest, url) for url, digest, ext, content, object_path in items])
+                        for item, result in zip(items, results):
+                            record = self._store_processed(item, result, save_dir)
+                            if record:
+                                yield record
+            finally:
+                # Consumer stopped early: drop downloads and chunks that haven't started
+                # (the pool itself is shared and stays up for the next scan)
+                for future in list(downloads) + list(processing):
+                    future.cancel()
+
+    def _start_image_pool(self):
+        """
+        (pool, workers) for image decoding; pool is None to decode inline
+        (image_workers=0 or no process support).
+        """
+        if self.image_workers == 0:
+            return None, 1
+        workers = self.image_workers or default_workers()
+        try:
+            return shared_pool(workers), workers
+        except (OSError, NotImplementedError, ValueError) as e:
+            print(f"Image process pool unavailable, decoding inline: {e}")
+            return None, 1
+
+    def _drop_image_pool(self, image_pool):
+        """Discards a broken pool; returns None so the remaining chunks are decoded inline."""
+        if image_pool:
+            print("Image process pool broke, decoding the remaining images inline")
+            discard_pool(image_pool)
+        return None
+
+    def _accept_size(self, width, height):
+        return accept_size(width, height)
+
+    def _read_image_body(self, resp):
+        """Streams the body, abandoning it as soon as the header shows an undersized image."""
+        return read_body(resp, self._accept_size)
 
     def _download_single_image(self, url, save_dir, index):
+        """
+        I/O half of an asset: fetches the bytes and dedupes them by content hash.
+        Returns a finished AssetImage for SVGs, a (url, digest, ext, content, object_path)
+        item for the image pool otherwise, or None if the asset is skipped.
+        """
         try:
-            resp = self.session.get(url, timeout=5)
+            if self.http_cache:
+                resp = self.http_cache.get(self.session, url, timeout=5, read=self._read_image_body)
+            else:
+                with self.session.get(url, timeout=5, stream=True) as raw:
+                    content = self._read_image_body(raw) if raw.status_code == 200 else b''
+                    resp = CachedResponse(raw.status_code, raw.headers, content) if content is not None else None
+            if resp is None:
+                return None  # Rejected from its header, body never downloaded
             if resp.status_code == 200:
+                # Same bytes behind another URL (CDN mirror, ?v= variant, high-res guess): keep one copy
+                digest = content_digest(resp.content)
+                with self._digest_lock:
+                    if digest in self._scan_digests:
+                        return None
+                    self._scan_digests.add(digest)
+                
+                # Already stored by an earlier scan: reuse the processed object as-is
+                object_path = self.asset_store.find(digest)
+                if object_path:
+                    if object_path.endswith('.svg'):
+                        path = self.asset_store.link_into(object_path, save_dir)
+                        return AssetImage.from_path(path, digest=digest, url=url)
+                    with open(object_path, 'rb') as f:
+                        return url, digest, os.path.splitext(object_path)[1], f.read(), object_path
+                
                 # Guess extension
                 ext = '.jpg'
                 ct = resp.headers.get('content-type', '').lower()
@@ -280,36 +451,32 @@ class AssetScraper:
                 elif 'webp' in ct: ext = '.webp'
                 elif 'gif' in ct: ext = '.gif'
                 
-                filename = f"asset_{index}_{int(time.time()*1000) % 10000}{ext}"
-                filepath = os.path.join(save_dir, filename)
-                
-                with open(filepath, 'wb') as f:
-                    f.write(resp.content)
-                
-                # Check Size & Optimize
-                if ext != '.svg':
-                    try:
-                        with Image.open(filepath) as img:
-                            # 1. Prevent Blur: Reject anything smaller than 300px
-                            if img.width < 300 or img.height < 300:
-                                os.remove(filepath)
-                                return None
-                            
-                            # 2. Prevent "High Quality" Bloat: Resize if too huge
-                            # User requested: "Don't want high quality" (interpreted as massive file size)
-                            # But "Not Blur" -> So we keep reasonable HD (e.g., 1500px)
-                            if img.width > 1500 or img.height > 1500:
-                                img.thumbnail((1500, 1500), Image.Resampling.LANCZOS)
-                                img.save(filepath, quality=85, optimize=True) # Good quality, efficient size
-                                
-                    except:
-                        os.remove(filepath)
-                        return None
-                return filepath
+                content = resp.content
+                if ext == '.svg':
+                    record = AssetImage(None, format='SVG', file_size=len(content), digest=digest, url=url)
+                    object_path = self.asset_store.put(digest, content, ext)
+                    record.path = self.asset_store.link_into(object_path, save_dir)
+                    return record
+                return url, digest, ext, content, None
         except:
             pass
         return None
 
+    def _store_processed(self, item, result, save_dir):
+        """Stores a processed image and links it into the scan folder. Returns its AssetImage, or None."""
+        url, digest, ext, content, object_path = item
+        if result is None:
+            return None  # Undersized (header couldn't be probed) or undecodable
+        content, record = result
+        try:
+            if object_path is None:
+                object_path = self.asset_store.put(digest, content, ext)
+            record.path = self.asset_store.link_into(object_path, save_dir)
+        except OSError as e:
+            print(f"Failed to store {url}: {e}")
+            return None
+        return record
+
 if __name__ == "__main__":
     s = AssetScraper()
     # s.scrape("https://example.com") 
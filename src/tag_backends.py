@@ -0,0 +1,219 @@
+"""
+Tagging Backends for AssetFlow
+Interchangeable image taggers: Gemini (vision model) and a CPU-only heuristic tagger for offline / keyless use.
+"""
+
+import numpy as np
+from PIL import Image
+
+from tagging import parse_batch_tags
+
+TAG_PROMPT = "Analyze this image and provide 3-5 short, relevant tags describing the subject matter, style, and visual elements. Return them as a comma-separated list."
+BATCH_TAG_PROMPT = """You will receive {count} images, each preceded by its label ("Image 1", "Image 2", ...).
+For each image provide 3-5 short, relevant tags describing the subject matter, style, and visual elements.
+Output strictly as valid JSON mapping the image number to its tags, e.g. {{"1": ["tag", "tag"], "2": ["tag", "tag", "tag"]}}"""
+# Image sent to each vision model: longest side, encoding and quality.
+# Gemini bills an image up to 384px per side as one flat 258-token tile.
+MODEL_IMAGE_SPECS = {
+    "gemini-1.5-flash": {"max_side": 384, "format": "JPEG", "quality": 80},
+}
+DEFAULT_IMAGE_SPEC = {"max_side": 512, "format": "JPEG", "quality": 80}
+
+# Heuristic tagger works on every image at this size
+HEURISTIC_SIDE = 64
+HUE_NAMES = [(15, "Red"), (45, "Orange"), (70, "Yellow"), (160, "Green"), (200, "Cyan"), (255, "Blue"), (290, "Purple"), (340, "Pink"), (360, "Red")]
+
+
+def error_tags(error):
+    """Short error tag for the UI."""
+    error_msg = str(error)
+    if "403" in error_msg:
+        return ["Error: Invalid API Key"]
+    elif "429" in error_msg:
+        return ["Error: Rate Limit"]
+    elif "budget" in error_msg:
+        return ["Error: Call Budget"]
+    else:
+        return [f"Error: {error_msg[:20]}..."]
+
+
+class TaggingBackend:
+    """
+    Interface for image taggers used by AssetAnalyzer.
+
+    Backends receive raster AssetImage records (vectors are handled by the
+    analyzer) and return a list of short tags per image. Subclasses implement
+    tag_batch(records); tag(record) defaults to a batch of one. `name` is part
+    of the cache key, so results from different backends never mix.
+    """
+
+    name = "base"
+    # True when every call costs quota (tagging is then subject to AssetAnalyzer's call budget)
+    metered = False
+    # Charged once per model call (CallBudget or RequestAllowance); set by AssetAnalyzer for a budgeted run
+    budget = None
+
+    def tag(self, record):
+        return self.tag_batch([record])[0]
+
+    def tag_batch(self, records):
+        raise NotImplementedError
+
+
+class GeminiBackend(TaggingBackend):
+    """Tags through a vision model behind a TaggingScheduler (rate limit, retries, concurrency)."""
+
+    metered = True
+
+    def __init__(self, scheduler, model_name, image_spec=None):
+        self.scheduler = scheduler
+        self.name = model_name
+        self.image_spec = image_spec or MODEL_IMAGE_SPECS.get(model_name, DEFAULT_IMAGE_SPEC)
+
+    def _model_image(self, record):
+        """Small encoded copy of the record for upload (a blob dict the SDK sends as-is)."""
+        spec = self.image_spec
+        return {
+            "mime_type": f"image/{spec['format'].lower()}",
+            "data": record.encoded(spec["max_side"], spec["format"], spec["quality"]),
+        }
+
+    def tag(self, record):
+        try:
+            response = self.scheduler.generate([TAG_PROMPT, self._model_image(record)], budget=self.budget)
+            return [tag.strip() for tag in response.text.split(',')]
+        except Exception as e:
+            print(f"AI tagging failed for {record.path}: {e}")
+            return error_tags(e)
+
+    def tag_batch(self, records):
+        """
+        Tags several records with one request and a JSON reply.
+        Images whose tags can't be read from the reply are retried one by one.
+        """
+        if len(records) == 1:
+            return [self.tag(records[0])]
+
+        parts = [BATCH_TAG_PROMPT.format(count=len(records))]
+        for i, record in enumerate(records, 1):
+            parts += [f"Image {i}:", self._model_image(record)]
+        try:
+            response = self.scheduler.generate(parts, budget=self.budget)
+        except Exception as e:
+            print(f"Batched AI tagging failed: {e}")
+            tags = error_tags(e)
+            if tags[0] in ("Error: Invalid API Key", "Error: Rate Limit", "Error: Call Budget"):
+                return [tags for _ in records]  # Single calls would fail the same way
+            return [self.tag(record) for record in records]
+
+        try:
+            tags_by_image = parse_batch_tags(response.text, len(records))
+        except Exception as e:
+            print(f"Could not parse batched tags ({e}), tagging one by one")
+            tags_by_image = [None] * len(records)
+        return [tags or self.tag(record) for tags, record in zip(tags_by_image, records)]
+
+
+class HeuristicBackend(TaggingBackend):
+    """
+    Offline tagger: describes tone, colour, texture, transparency and shape
+    from pixel statistics computed for a whole batch at once (NumPy).
+    No subject recognition, but no network, quota or key either.
+    """
+
+    name = "heuristic"
+
+    def tag_batch(self, records):
+        if not records:
+            return []
+        side = HEURISTIC_SIDE
+        pixels = np.stack([
+            np.asarray(r.thumbnail.convert('RGBA').resize((side, side), Image.Resampling.BILINEAR), dtype=np.float32) / 255
+            for r in records
+        ])  # (B, side, side, 4)
+        rgb, alpha = pixels[..., :3], pixels[..., 3]
+        opaque = alpha >= 0.5
+        weight = opaque.sum(axis=(1, 2)).clip(min=1)
+
+        def masked_mean(values):
+            return (values * opaque).sum(axis=(1, 2)) / weight
+
+        luma = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+        high, low = rgb.max(axis=3), rgb.min(axis=3)
+        saturation = np.where(high > 0, (high - low) / np.maximum(high, 1e-6), 0)
+
+        brightness = masked_mean(luma)
+        mean_saturation = masked_mean(saturation)
+        transparency = 1 - opaque.mean(axis=(1, 2))
+
+        # Hasler & Süsstrunk colourfulness (0 = grey, ~100+ = very colourful)
+        rg = (rgb[..., 0] - rgb[..., 1]) * 255
+        yb = (0.5 * (rgb[..., 0] + rgb[..., 1]) - rgb[..., 2]) * 255
+        rg_mean, yb_mean = masked_mean(rg), masked_mean(yb)
+        rg_var = masked_mean((rg - rg_mean[:, None, None]) ** 2)
+        yb_var = masked_mean((yb - yb_mean[:, None, None]) ** 2)
+        colorfulness = np.sqrt(rg_var + yb_var) + 0.3 * np.sqrt(rg_mean ** 2 + yb_mean ** 2)
+
+        # Share of pixels on a strong luminance edge
+        edges = (np.abs(np.diff(luma, axis=1))[:, :, :-1] + np.abs(np.diff(luma, axis=2))[:, :-1, :]) > 0.1
+        edge_density = edges.mean(axis=(1, 2))
+
+        # Plain light border: typical of product shots on seamless backgrounds
+        border = np.concatenate([luma[:, 0], luma[:, -1], luma[:, :, 0], luma[:, :, -1]], axis=1)
+        border_sat = np.concatenate([saturation[:, 0], saturation[:, -1], saturation[:, :, 0], saturation[:, :, -1]], axis=1)
+        clean_border = ((border > 0.9) & (border_sat < 0.1)).mean(axis=1)
+
+        # Saturation-weighted circular mean hue
+        hue = self._hue(rgb, high, low)
+        hue_weight = saturation * opaque
+        hue_x = (np.cos(hue) * hue_weight).sum(axis=(1, 2))
+        hue_y = (np.sin(hue) * hue_weight).sum(axis=(1, 2))
+        mean_hue = np.degrees(np.arctan2(hue_y, hue_x)) % 360
+
+        tags = []
+        for i, record in enumerate(records):
+            image_tags = []
+            if transparency[i] > 0.2:
+                image_tags.append("Transparent Cutout")
+            elif clean_border[i] > 0.8:
+                image_tags.append("Clean Background")
+
+            if colorfulness[i] < 12:
+                image_tags.append("Monochrome")
+            else:
+                image_tags.append(next(name for limit, name in HUE_NAMES if mean_hue[i] < limit))
+                if colorfulness[i] > 60:
+                    image_tags.append("Vibrant")
+                elif mean_saturation[i] < 0.2:
+                    image_tags.append("Muted")
+                image_tags.append("Warm Tones" if mean_hue[i] < 70 or mean_hue[i] >= 300 else "Cool Tones")
+
+            if brightness[i] < 0.3:
+                image_tags.append("Dark")
+            elif brightness[i] > 0.75:
+                image_tags.append("Bright")
+
+            if edge_density[i] < 0.04:
+                image_tags.append("Minimal")
+            elif edge_density[i] > 0.25:
+                image_tags.append("Detailed")
+
+            ratio = record.width / max(record.height, 1)
+            if ratio >= 2.5:
+                image_tags.append("Banner")
+            elif ratio >= 1.2:
+                image_tags.append("Landscape")
+            elif ratio <= 0.8:
+                image_tags.append("Portrait")
+            else:
+                image_tags.append("Square")
+            tags.append(image_tags[:5])
+        return tags
+
+    @staticmethod
+    def _hue(rgb, high, low):
+        """Per-pixel hue in radians (arbitrary where the pixel is grey; those carry no weight)."""
+        r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+        delta = np.maximum(high - low, 1e-6)
+        hue = np.where(high == r, ((g - b) / delta) % 6, np.where(high == g, (b - r) / delta + 2, (r - g) / delta + 4))
+        return hue * (np.pi / 3)
@@ -0,0 +1,125 @@
+"""
+Budgeted Tagging for AssetFlow
+Picks a colour- and structure-diverse subset of assets to tag when model calls are capped; the rest borrow tags from their nearest representative.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from near_duplicates import hamming
+from palette import rgb_to_lab
+
+# An asset is novel (worth a model call) when its distance to every
+# representative exceeds 1.0: ~20 ΔE of mean colour, or ~24 of 64 dHash bits
+COLOR_SCALE = 20.0
+HASH_SCALE = 24.0
+NOVELTY_THRESHOLD = 1.0
+
+
+class RequestAllowance:
+    """
+    Decides whether one more asset can still be tagged within a CallBudget,
+    counting the requests tagging will actually send.
+
+    Representatives chosen within one batching window (up to batch_size, at
+    most max_wait apart) are expected to share a request; a slow stream
+    therefore admits fewer of them than the budget times the batch size.
+    Metered backends charge their calls through spend(), so a request that was
+    flushed but is still waiting for a rate-limit slot keeps its call reserved.
+    """
+
+    def __init__(self, budget, batch_size, max_wait):
+        self.budget = budget
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max_wait
+        self._groups = []  # [opened_at, keys] per expected request, oldest first
+        self._sending = 0  # Requests flushed to the tagger but not charged yet
+        self._lock = threading.Lock()
+
+    def _open_group(self):
+        if self._groups:
+            opened_at, keys = self._groups[-1]
+            if len(keys) < self.batch_size and time.monotonic() - opened_at <= self.max_wait:
+                return keys
+        return None
+
+    def has_room(self):
+        with self._lock:
+            needed = len(self._groups) + self._sending + (0 if self._open_group() is not None else 1)
+            return self.budget.spent + needed <= self.budget.limit
+
+    def reserve(self, key):
+        with self._lock:
+            keys = self._open_group()
+            if keys is None:
+                self._groups.append([time.monotonic(), set()])
+                keys = self._groups[-1][1]
+            keys.add(key)
+
+    def sending(self, keys):
+        """One request carrying these assets is about to go out."""
+        with self._lock:
+            keys = set(keys)
+            for group in self._groups:
+                group[1] -= keys
+            self._groups = [group for group in self._groups if group[1]]
+            self._sending += 1
+
+    def spend(self):
+        """CallBudget.spend(), consuming the call held by sending()."""
+        self.budget.spend()
+        with self._lock:
+            self._sending = max(0, self._sending - 1)
+
+
+class RepresentativeSelector:
+    """
+    Online farthest-first selection over (mean colour, dHash) fingerprints.
+
+    choose() is called once per asset as it arrives: while the allowance has
+    room, assets unlike every representative so far become representatives
+    (tagged by the model); everything else is assigned to its nearest
+    representative and later copies its tags.
+    """
+
+    def __init__(self, allowance, threshold=NOVELTY_THRESHOLD):
+        self.allowance = allowance
+        self.threshold = threshold
+        self._keys = []
+        self._hashes = []
+        self._labs = []
+        self.tags = {}  # representative key -> tags once known
+
+    def _distances(self, hash_value, lab):
+        if not self._keys:
+            return np.empty(0)
+        color = np.sqrt(((np.array(self._labs) - lab) ** 2).sum(axis=1)) / COLOR_SCALE
+        structure = np.array([hamming(hash_value, h) for h in self._hashes]) / HASH_SCALE
+        return color + structure
+
+    def choose(self, key, hash_value, mean_color):
+        """Returns ('tag', key) to tag this asset, or ('copy', representative_key)."""
+        lab = rgb_to_lab([mean_color])[0]
+        distances = self._distances(hash_value, lab)
+        if (len(distances) == 0 or distances.min() > self.threshold) and self.allowance.has_room():
+            self.allowance.reserve(key)
+            self._keys.append(key)
+            self._hashes.append(hash_value)
+            self._labs.append(lab)
+            return 'tag', key
+        if len(distances) == 0:
+            return 'copy', None  # Budget too small to tag anything
+        return 'copy', self._keys[int(distances.argmin())]
+
+    def nearest_tagged(self, key):
+        """Closest representative (to representative `key`) whose tags are known, or None."""
+        if key not in self._keys:
+            return None
+        i = self._keys.index(key)
+        distances = self._distances(self._hashes[i], self._labs[i])
+        for j in np.argsort(distances, kind='stable'):
+            if self._keys[j] in self.tags:
+                return self._keys[j]
+        return None
@@ -0,0 +1,224 @@
+"""
+Rate-Limited Tagging Scheduler for AssetFlow
+Token-bucket throttling, bounded concurrency, exponential backoff and multi-image batching around the vision model calls.
+"""
+
+import concurrent.futures
+import json
+import random
+import threading
+import time
+
+# Gemini free tier quota for gemini-1.5-flash; raise for paid keys
+DEFAULT_REQUESTS_PER_MINUTE = 15
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 4
+
+# Substrings of API errors worth retrying (quota, overload, timeouts)
+RETRYABLE_ERRORS = ("429", "Resource has been exhausted", "quota", "500", "503", "overloaded", "Deadline", "timed out")
+
+_shared_buckets = {}
+_shared_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second up to `capacity`.
+    acquire() blocks until a token is available; safe to share across threads.
+    """
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+def shared_bucket(key, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE):
+    """
+    One bucket per API key for the whole process, so concurrent scans
+    (battle mode) share the key's quota instead of each assuming all of it.
+    """
+    with _shared_lock:
+        bucket = _shared_buckets.get(key)
+        if bucket is None or bucket.rate != requests_per_minute / 60:
+            bucket = TokenBucket(requests_per_minute / 60, capacity=max(1, requests_per_minute // 10))
+            _shared_buckets[key] = bucket
+        return bucket
+
+
+class CallBudgetExceeded(Exception):
+    """Raised instead of calling the model once a CallBudget is spent."""
+
+
+class CallBudget:
+    """Model calls a run may still make; every attempt (retries included) spends one."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.spent = 0
+        self._lock = threading.Lock()
+
+    def spend(self):
+        with self._lock:
+            if self.spent >= self.limit:
+                raise CallBudgetExceeded(f"Call budget of {self.limit} exhausted")
+            self.spent += 1
+
+
+def is_retryable(error):
+    message = str(error)
+    return any(marker in message for marker in RETRYABLE_ERRORS)
+
+
+class TaggingScheduler:
+    """
+    Wraps a model exposing generate_content(parts) -> response with .text
+    (a google.generativeai GenerativeModel, or a local fake in tests).
+
+    Every call waits for a token from the bucket, at most max_concurrency
+    calls are in flight, and rate-limit / transient errors are retried with
+    exponential backoff and jitter before the last error is raised.
+    Passing a CallBudget to generate() caps the attempts made for that caller
+    (CallBudgetExceeded), so tagging and the vibe check can have separate limits.
+    """
+
+    def __init__(self, model, bucket=None, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 max_retries=DEFAULT_MAX_RETRIES, base_delay=2.0, max_delay=60.0, sleep=time.sleep):
+        """
+        Args:
+            model: Object with generate_content(parts)
+            bucket: TokenBucket to draw from (None = no rate limit)
+            max_concurrency: Calls allowed in flight at once
+            max_retries: Retries after the first attempt for retryable errors
+            base_delay / max_delay: Backoff bounds in seconds (doubled per retry)
+            sleep: Injected for tests
+        """
+        self.model = model
+        self.bucket = bucket
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def generate(self, parts, budget=None):
+        """
+        Calls model.generate_content(parts) under the limits. Returns the response.
+        budget: optional CallBudget (anything with spend()) every attempt is charged to.
+        """
+        attempt = 0
+        while True:
+            if self.bucket:
+                self.bucket.acquire()
+            with self._slots:
+                if budget is not None:
+                    budget.spend()
+                try:
+                    return self.model.generate_content(parts)
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_retryable(e):
+                        raise
+                    error = e
+            delay = min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+            print(f"Model call failed ({str(error)[:60]}), retrying in {delay:.1f}s")
+            self._sleep(delay)
+            attempt += 1
+
+
+def parse_batch_tags(text, count):
+    """
+    Reads the per-image tags out of a batched JSON reply such as
+    {"1": ["tag", ...], "2": [...]} (a plain list of lists is accepted too).
+    Returns a list of count tag lists, with None where an image's tags are missing.
+    """
+    text = text.replace('```json', '').replace('```', '').strip()
+    start = min((i for i in (text.find('{'), text.find('[')) if i >= 0), default=-1)
+    # raw_decode ignores any chatter after the JSON value
+    data = json.JSONDecoder().raw_decode(text, start)[0] if start >= 0 else None
+    if isinstance(data, list):
+        data = {str(i): tags for i, tags in enumerate(data, 1)}
+    if not isinstance(data, dict):
+        raise ValueError("Batched reply is not a JSON object")
+
+    tags_by_image = []
+    for i in range(1, count + 1):
+        tags = data.get(str(i), data.get(f"Image {i}"))
+        if isinstance(tags, str):
+            tags = tags.split(',')
+        if isinstance(tags, list):
+            tags = [str(t).strip() for t in tags if str(t).strip()]
+        tags_by_image.append(tags or None)
+    return tags_by_image
+
+
+class MicroBatcher:
+    """
+    Groups concurrent submit() calls into one flush(items) -> results call.
+
+    A batch goes out as soon as batch_size items are waiting, or max_wait
+    seconds after its first item arrived. submit() blocks until the item's
+    batch has been processed and returns its result (or raises its error).
+    """
+
+    def __init__(self, flush, batch_size=4, max_wait=0.5):
+        self.flush = flush
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._pending = []
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def submit(self, item):
+        future = concurrent.futures.Future()
+        batch = None
+        with self._lock:
+            self._pending.append((item, future))
+            if len(self._pending) >= self.batch_size:
+                batch = self._take()
+            elif len(self._pending) == 1:
+                self._timer = threading.Timer(self.max_wait, self._flush_pending)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self._run(batch)
+        return future.result()
+
+    def _take(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        return batch
+
+    def _flush_pending(self):
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._run(batch)
+
+    def _run(self, batch):
+        try:
+            results = self.flush([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
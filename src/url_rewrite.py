@@ -0,0 +1,168 @@
+"""
+Image URL Rewriting for AssetFlow
+Turns CDN thumbnail URLs into their full-size originals with precompiled per-CDN rules.
+
+The first rule whose host/path test matches decides; URLs no CDN rule claims
+go through the generic size-suffix / resize-query rule.
+
+Shopify (size suffixes and resize query params; the cache-busting v= stays):
+
+>>> high_res_url("https://cdn.shopify.com/s/files/1/0001/products/shoe_400x400_crop_center@2x.jpg?v=169")
+'https://cdn.shopify.com/s/files/1/0001/products/shoe.jpg?v=169'
+>>> high_res_url("https://brand.com/cdn/shop/files/hero.jpg?v=12&width=533&crop=center")
+'https://brand.com/cdn/shop/files/hero.jpg?v=12'
+>>> high_res_url("https://cdn.shopify.com/s/files/1/products/bag_grande.png")
+'https://cdn.shopify.com/s/files/1/products/bag.png'
+
+Cloudinary (transformation segments between /upload/ and the version / public id):
+
+>>> high_res_url("https://res.cloudinary.com/demo/image/upload/w_400,h_300,c_fill/q_auto,f_auto/v1712/shoes/red.jpg")
+'https://res.cloudinary.com/demo/image/upload/v1712/shoes/red.jpg'
+>>> high_res_url("https://res.cloudinary.com/demo/image/upload/v1712/shoes/red.jpg")
+'https://res.cloudinary.com/demo/image/upload/v1712/shoes/red.jpg'
+
+imgix (rendering params dropped, anything else kept):
+
+>>> high_res_url("https://brand.imgix.net/look/01.jpg?w=320&h=240&fit=crop&auto=format,compress&s=abc")
+'https://brand.imgix.net/look/01.jpg?s=abc'
+
+WordPress (generated -WxH sizes, Jetpack/Photon resize params):
+
+>>> high_res_url("https://brand.com/wp-content/uploads/2024/05/banner-1024x576.jpg")
+'https://brand.com/wp-content/uploads/2024/05/banner.jpg'
+>>> high_res_url("https://i0.wp.com/brand.com/wp-content/uploads/logo-150x150.png?resize=150%2C150&ssl=1")
+'https://i0.wp.com/brand.com/wp-content/uploads/logo.png?ssl=1'
+
+Next.js image optimizer (the original is in the url= param, relative to the site):
+
+>>> high_res_url("https://brand.com/_next/image?url=%2Fimages%2Fhero.png&w=640&q=75")
+'https://brand.com/images/hero.png'
+>>> high_res_url("https://brand.com/_next/image?url=https%3A%2F%2Fcdn.brand.com%2Fa.jpg&w=1080&q=75")
+'https://cdn.brand.com/a.jpg'
+
+Generic fallback (the pre-existing heuristics):
+
+>>> high_res_url("https://shop.example/media/image_200x.jpg")
+'https://shop.example/media/image.jpg'
+>>> high_res_url("https://shop.example/media/photo.jpg?width=300&quality=60")
+'https://shop.example/media/photo.jpg'
+>>> high_res_url("https://shop.example/media/photo.jpg")
+'https://shop.example/media/photo.jpg'
+"""
+
+import re
+from functools import lru_cache
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urljoin
+
+# Distinct URLs remembered (pages repeat the same thumbnails across a crawl)
+CACHE_SIZE = 65536
+
+_SHOPIFY_PATH = re.compile(r'/(?:s/files|cdn/shop)/')
+_SHOPIFY_SIZE = re.compile(
+    r'_(?:\d+x\d*|x\d+|pico|icon|thumb|small|compact|medium|large|grande|original|master)'
+    r'(?:_crop_(?:top|center|bottom|left|right))?(?:@\dx)?(?=\.\w+$)',
+    re.IGNORECASE
+)
+_SHOPIFY_PARAMS = frozenset({'width', 'height', 'crop', 'pad_color', 'format'})
+
+_CLOUDINARY_TRANSFORMS = re.compile(
+    r'(/(?:image|video)/(?:upload|fetch|private|authenticated)/)'
+    r'(?:[a-z]{1,3}_[^/,]+(?:,[a-z]{1,3}_[^/,]+)*/)+'
+)
+
+_IMGIX_PARAMS = frozenset({'w', 'h', 'fit', 'crop', 'dpr', 'q', 'auto', 'fm', 'max-w', 'max-h', 'min-w', 'min-h', 'rect', 'ar', 'ixlib'})
+
+_WP_PHOTON_HOST = re.compile(r'i\d\.wp\.com$')
+_WP_SIZE = re.compile(r'-\d+x\d+(?=\.\w+$)')
+_WP_PARAMS = frozenset({'resize', 'fit', 'w', 'h', 'zoom', 'quality', 'strip', 'crop'})
+
+# Cheap pre-check: URLs without any of these skip URL splitting and go straight to the generic rule
+_CDN_HINT = re.compile(r'shopify\.com|/s/files/|/cdn/shop/|cloudinary\.com|imgix\.net|/wp-content/uploads/|wp\.com|/_next/image', re.IGNORECASE)
+
+# Generic heuristics (sizes in file names, then resize query params)
+_GENERIC_SIZE = re.compile(r'[-_]\d{2,}x\d*')
+_GENERIC_SIZE_PREFIX = re.compile(r'x\d{2,}[-_]')
+_GENERIC_NAMED_SIZE = re.compile(r'_(small|thumb|medium|large|grande|icon|square|compact|portrait|landscape|cropped|\d+x)\.', re.IGNORECASE)
+_GENERIC_RESIZE_QUERY = ('width=', 'w=', 'height=', 'h=', 'size=', 'quality=', 'q=')
+
+
+def _drop_params(parts, names):
+    """parts with the named query params removed (the rest kept verbatim, in order)."""
+    if not parts.query:
+        return parts
+    kept = [pair for pair in parts.query.split('&') if pair.split('=', 1)[0].lower() not in names]
+    return parts._replace(query='&'.join(kept))
+
+
+def _sub_path(parts, pattern, repl=''):
+    return parts._replace(path=pattern.sub(repl, parts.path))
+
+
+def _shopify(url, parts):
+    return urlunsplit(_drop_params(_sub_path(parts, _SHOPIFY_SIZE), _SHOPIFY_PARAMS))
+
+
+def _cloudinary(url, parts):
+    return urlunsplit(_sub_path(parts, _CLOUDINARY_TRANSFORMS, r'\1'))
+
+
+def _imgix(url, parts):
+    return urlunsplit(_drop_params(parts, _IMGIX_PARAMS))
+
+
+def _wordpress(url, parts):
+    return urlunsplit(_drop_params(_sub_path(parts, _WP_SIZE), _WP_PARAMS))
+
+
+def _next_image(url, parts):
+    original = dict(parse_qsl(parts.query)).get('url')
+    return urljoin(url, original) if original else url
+
+
+def _generic(url, parts=None):
+    new_url = _GENERIC_SIZE.sub('', url)  # catch _500x, _500x500
+    new_url = _GENERIC_SIZE_PREFIX.sub('', new_url)  # catch x500_
+    new_url = _GENERIC_NAMED_SIZE.sub('.', new_url)
+    if new_url != url:
+        return new_url
+    if '?' in url:
+        base, qs = url.split('?', 1)
+        if any(x in qs for x in _GENERIC_RESIZE_QUERY):
+            return base
+    return url
+
+
+# (name, applies(host, path), rewrite(url, parts)); first match wins
+RULES = [
+    ("nextjs", lambda host, path: path.endswith('/_next/image'), _next_image),
+    ("shopify", lambda host, path: host.endswith('shopify.com') or _SHOPIFY_PATH.search(path) is not None, _shopify),
+    ("cloudinary", lambda host, path: host.endswith('cloudinary.com'), _cloudinary),
+    ("imgix", lambda host, path: host.endswith('.imgix.net'), _imgix),
+    ("wordpress", lambda host, path: '/wp-content/uploads/' in path or _WP_PHOTON_HOST.match(host) is not None, _wordpress),
+]
+
+
+def match_rule(url):
+    """Name of the CDN rule that handles url ('generic' when none does)."""
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    for name, applies, _ in RULES:
+        if applies(host, parts.path):
+            return name
+    return "generic"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def high_res_url(url):
+    """Best guess at the full-size original of an image URL (url itself when nothing applies)."""
+    if not _CDN_HINT.search(url):
+        return _generic(url)
+    try:
+        parts = urlsplit(url)
+        host = parts.netloc.lower()
+        for _, applies, rewrite in RULES:
+            if applies(host, parts.path):
+                return rewrite(url, parts)
+        return _generic(url, parts)
+    except ValueError:
+        return url  # Malformed URL (e.g. bad IPv6 host)
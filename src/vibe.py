@@ -0,0 +1,167 @@
+"""
+Vibe Check Schema for AssetFlow
+Typed result for analyze_vibe plus a tolerant JSON extractor for model replies.
+"""
+
+import ast
+import json
+import re
+
+VIBE_SCHEMA = """{
+    "vibe_keywords": ["Adj1", "Adj2", "Adj3"],
+    "personality_score": "Trait: X/10",
+    "explanation": "..."
+}"""
+
+_SCORE = re.compile(r'^\s*(?:(?P<trait>[^:]+?)\s*:\s*)?(?P<score>\d+(?:\.\d+)?)\s*(?:/\s*10)?\s*$')
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+_SMART_QUOTES = str.maketrans({'“': '"', '”': '"', '‘': "'", '’': "'"})
+
+
+class VibeSchemaError(ValueError):
+    """The model's reply has no JSON object, or it doesn't fit the vibe schema."""
+
+
+class JsonObjectExtractor:
+    """
+    Incremental scanner that pulls the first complete top-level JSON object out
+    of free text (markdown fences, preambles, trailing chatter).
+
+    feed() can be called with chunks as they stream in; it returns the parsed
+    object as soon as one closes, else None. With a convert callable, objects
+    it rejects with VibeSchemaError (e.g. an example echoed before the answer)
+    are skipped and feed() returns the first converted one; the first
+    rejection is kept in `error`.
+    """
+
+    def __init__(self, convert=None):
+        self.convert = convert
+        self.error = None
+        self._buffer = []
+        self._depth = 0
+        self._quote = None  # '"' or "'" while inside a string
+        self._escaped = False
+
+    def feed(self, chunk):
+        for char in chunk:
+            if self._depth == 0:
+                if char == '{':
+                    self._buffer = ['{']
+                    self._depth = 1
+                continue
+            self._buffer.append(char)
+            if self._quote:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == self._quote:
+                    self._quote = None
+            elif char in '"\'':
+                # Single quotes too: Python-literal replies ({'explanation': 'don\'t {'})
+                self._quote = char
+            elif char == '{':
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    parsed = _loads_lenient(''.join(self._buffer))
+                    if not isinstance(parsed, dict):
+                        continue  # Not JSON after all (e.g. a "{...}" in prose): keep scanning
+                    if not self.convert:
+                        return parsed
+                    try:
+                        return self.convert(parsed)
+                    except VibeSchemaError as e:
+                        self.error = self.error or e  # Valid JSON, wrong shape: keep scanning
+        return None
+
+
+def _loads_lenient(text):
+    """
+    json.loads, retried after fixing smart quotes, trailing commas and Python
+    literals, then as a Python literal (single-quoted {'vibe_keywords': ...} replies).
+    """
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    repaired = _TRAILING_COMMA.sub(r'\1', text.translate(_SMART_QUOTES))
+    repaired = re.sub(r'\bTrue\b', 'true', re.sub(r'\bFalse\b', 'false', re.sub(r'\bNone\b', 'null', repaired)))
+    try:
+        return json.loads(repaired)
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+def extract_json_object(text, convert=None):
+    """
+    Returns the first JSON object found in text (the first one convert accepts,
+    converted, if given). Raises VibeSchemaError if there is none.
+    """
+    extractor = JsonObjectExtractor(convert)
+    data = extractor.feed(text.translate(_SMART_QUOTES))
+    if data is None:
+        raise extractor.error or VibeSchemaError("No JSON object in reply")
+    return data
+
+
+class VibeResult:
+    """A validated vibe check: 3 keywords, a 'Trait: X/10' score and one sentence."""
+
+    def __init__(self, vibe_keywords, trait, score, explanation):
+        self.vibe_keywords = vibe_keywords
+        self.trait = trait
+        self.score = score
+        self.explanation = explanation
+
+    @property
+    def personality_score(self):
+        return f"{self.trait}: {self.score:g}/10" if self.trait else f"{self.score:g}/10"
+
+    @classmethod
+    def from_data(cls, data):
+        """Validates and normalizes a parsed reply. Raises VibeSchemaError."""
+        keywords = data.get('vibe_keywords')
+        if isinstance(keywords, str):
+            keywords = keywords.split(',')
+        if not isinstance(keywords, list):
+            raise VibeSchemaError("vibe_keywords must be a list")
+        keywords = [str(k).strip() for k in keywords if str(k).strip()]
+        if len(keywords) < 3:
+            raise VibeSchemaError(f"vibe_keywords has {len(keywords)} entries, expected 3")
+        keywords = keywords[:3]
+
+        raw_score = data.get('personality_score')
+        match = _SCORE.match(str(raw_score)) if raw_score is not None else None
+        if not match:
+            raise VibeSchemaError(f"personality_score {raw_score!r} is not 'Trait: X/10'")
+        score = float(match.group('score'))
+        score = int(score) if score.is_integer() else score
+        if not 0 <= score <= 10:
+            raise VibeSchemaError(f"personality_score {score} is outside 0-10")
+
+        explanation = str(data.get('explanation') or '').strip()
+        return cls(keywords, (match.group('trait') or '').strip(), score, explanation)
+
+    def to_dict(self):
+        """
+        Plain dict kept in session state / history. 'description' and 'score'
+        are the names the PDF/CSV exports read.
+        """
+        return {
+            "vibe_keywords": self.vibe_keywords,
+            "personality_score": self.personality_score,
+            "explanation": self.explanation,
+            "description": self.explanation,
+            "score": self.score,
+        }
+
+
+def parse_vibe(text):
+    """Model reply -> VibeResult. Raises VibeSchemaError."""
+    return extract_json_object(text, VibeResult.from_data)